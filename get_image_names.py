@@ -12,10 +12,27 @@ import sys
 import zipfile
 import hashlib
 import re
-from xml.etree import ElementTree as ET
-from typing import Dict, List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
+# XMLパーサー（lxmlがあればC実装を優先、なければ標準ライブラリ）
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    from xml.etree import ElementTree as ET
+    HAS_LXML = False
+
+# 画像の同一性判定用ハッシュ（既定は従来どおりMD5。xxhashがあれば --fast-hash でXXH3を選べる）
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+DEFAULT_HASH_ALGO = 'md5'
+
 
 # XML名前空間
 NAMESPACES = {
@@ -25,6 +42,29 @@ NAMESPACES = {
     'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
 }
 
+# サポートする画像拡張子
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.wmf', '.emf', '.svg'})
+
+# スライドXMLのパス（スライド番号を取得）
+_SLIDE_RE = re.compile(r'ppt/slides/slide(\d+)\.xml$')
+
+# 画像ファイル名らしい拡張子
+_EXT_RE = re.compile(r'\.(?:png|jpe?g|gif|bmp|tiff|wmf|emf|svg)$', re.IGNORECASE)
+
+# p:pic要素のタグ名
+_PIC_TAG = '{http://schemas.openxmlformats.org/presentationml/2006/main}pic'
+
+# p:pic配下の検索（lxmlの場合はモジュール読み込み時にXPathをコンパイルしておく）
+if HAS_LXML:
+    _find_cnvpr = ET.XPath('.//p:nvPicPr/p:cNvPr', namespaces=NAMESPACES)
+    _find_blip = ET.XPath('.//p:blipFill/a:blip', namespaces=NAMESPACES)
+else:
+    def _find_cnvpr(pic):
+        return pic.findall('.//p:nvPicPr/p:cNvPr', NAMESPACES)
+
+    def _find_blip(pic):
+        return pic.findall('.//p:blipFill/a:blip', NAMESPACES)
+
 
 @dataclass
 class ImageInfo:
@@ -34,26 +74,66 @@ class ImageInfo:
     original_name: Optional[str] = None  # 元のファイル名（取得できた場合）
     description: Optional[str] = None    # 説明文（alt text）
     size: int = 0               # ファイルサイズ
-    md5_hash: str = ""          # MD5ハッシュ
+    md5_hash: str = ""          # MD5ハッシュ（MD5で計算した場合のみ）
     used_in_slides: List[int] = None  # 使用されているスライド番号
     shape_name: Optional[str] = None  # シェイプ名
+    image_hash: str = ""        # ハッシュ値
+    hash_algo: str = "md5"      # ハッシュアルゴリズム (md5 / xxh3_64)
 
     def __post_init__(self):
         if self.used_in_slides is None:
             self.used_in_slides = []
+        # 従来どおり md5_hash だけを指定された場合と、image_hash をMD5で計算した場合の両方に対応
+        if self.md5_hash and not self.image_hash:
+            self.image_hash, self.hash_algo = self.md5_hash, 'md5'
+        elif self.hash_algo == 'md5' and not self.md5_hash:
+            self.md5_hash = self.image_hash
+
 
+# スライドから抽出した画像参照 (内部パス, スライド番号, シェイプ名, 説明)
+ImageRef = Tuple[str, int, Optional[str], Optional[str]]
 
-def calculate_hash(data: bytes) -> str:
-    """バイトデータのMD5ハッシュを計算"""
-    return hashlib.md5(data).hexdigest()
+
+# MD5は未使用のハッシュオブジェクトを複製して使う（OpenSSL 3では生成のたびにアルゴリズムの
+# 検索が走るため）。暗号用途ではないので usedforsecurity=False を指定する（Python 3.9+）
+try:
+    _MD5_BASE = hashlib.md5(usedforsecurity=False)
+except TypeError:
+    _MD5_BASE = hashlib.md5()
+
+
+def calculate_hash(data: bytes, algo: str = DEFAULT_HASH_ALGO) -> str:
+    """バイトデータのハッシュを計算（algo='xxh3_64' の場合はXXH3、それ以外はMD5）"""
+    if algo == 'xxh3_64':
+        return xxhash.xxh3_64_hexdigest(data)
+    hasher = _MD5_BASE.copy()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _join_posix(base: str, rel: str) -> str:
+    """ZIP内パス（常に'/'区切り）を結合し '..' と '.' を解決する（os.pathを使わない）"""
+    out: List[str] = []
+    for part in base.split('/') + rel.split('/'):
+        if part == '..':
+            if out:
+                out.pop()
+        elif part and part != '.':
+            out.append(part)
+    return '/'.join(out)
+
+
+def parse_zip_xml(zf: zipfile.ZipFile, path: str):
+    """ZIP内のXMLをストリームから直接パース（bytes/strの中間コピーを作らない）"""
+    with zf.open(path) as fp:
+        return ET.parse(fp).getroot()
 
 
 def get_relationship_map(zf: zipfile.ZipFile, rels_path: str) -> Dict[str, str]:
     """リレーションシップファイルからrId→Targetのマッピングを取得"""
     rel_map = {}
     try:
-        rels_content = zf.read(rels_path).decode('utf-8')
-        root = ET.fromstring(rels_content)
+        root = parse_zip_xml(zf, rels_path)
         for rel in root.findall('rel:Relationship', NAMESPACES):
             rid = rel.get('Id')
             target = rel.get('Target')
@@ -65,85 +145,116 @@ def get_relationship_map(zf: zipfile.ZipFile, rels_path: str) -> Dict[str, str]:
     return rel_map
 
 
+def iter_pic_elements(source):
+    """スライドXMLのファイルオブジェクトからp:pic要素を逐次取り出す（処理済みの要素は解放）"""
+    if HAS_LXML:
+        for _, pic in ET.iterparse(source, events=('end',), tag=_PIC_TAG):
+            yield pic
+            pic.clear(keep_tail=True)
+            # 処理済みの兄弟要素を削除して作業メモリを抑える
+            parent = pic.getparent()
+            while pic.getprevious() is not None:
+                del parent[0]
+    else:
+        for _, elem in ET.iterparse(source, events=('end',)):
+            if elem.tag == _PIC_TAG:
+                yield elem
+                elem.clear()
+
+
+def rels_path_for(part_path: str) -> str:
+    """スライドなどのパートに対応するリレーションシップファイルのパス"""
+    part_dir, _, part_name = part_path.rpartition('/')
+    return f"{part_dir}/_rels/{part_name}.rels"
+
+
 def extract_image_info_from_slide(
     zf: zipfile.ZipFile, 
     slide_path: str, 
     slide_number: int,
-    image_info_map: Dict[str, ImageInfo]
-) -> None:
-    """スライドXMLから画像情報を抽出"""
-    
-    # リレーションシップファイルのパス
-    slide_dir = os.path.dirname(slide_path)
-    slide_name = os.path.basename(slide_path)
-    rels_path = f"{slide_dir}/_rels/{slide_name}.rels"
+    rel_map: Optional[Dict[str, str]] = None
+) -> List[ImageRef]:
+    """
+    スライドXMLから画像の参照情報を抽出
+
+    共有の辞書は更新せず結果を返すだけなので、複数スレッドから並列に呼び出せる
+    （zf はスレッドごとに別々に開いたものを渡すこと）。
+    rel_map を渡した場合はリレーションシップファイルを読み直さない。
+    """
+    refs: List[ImageRef] = []
+    slide_dir = slide_path.rpartition('/')[0]
     
     # rId→画像パスのマッピングを取得
-    rel_map = get_relationship_map(zf, rels_path)
+    if rel_map is None:
+        rel_map = get_relationship_map(zf, rels_path_for(slide_path))
+    
+    # 画像へのリレーションシップがなければ、スライドXMLを読まずに終了
+    # （画像のないスライドマスター・レイアウトの大半はここで省略される）
+    if not rel_map:
+        return refs
     
     try:
-        slide_content = zf.read(slide_path).decode('utf-8')
-        root = ET.fromstring(slide_content)
-        
-        # p:pic要素（画像）を検索
-        for pic in root.iter('{http://schemas.openxmlformats.org/presentationml/2006/main}pic'):
-            # nvPicPr > cNvPr から名前と説明を取得
-            cNvPr = pic.find('.//p:nvPicPr/p:cNvPr', NAMESPACES)
-            shape_name = None
-            description = None
-            
-            if cNvPr is not None:
-                shape_name = cNvPr.get('name')
-                description = cNvPr.get('descr')
-            
-            # blipFill > blip から画像参照(rId)を取得
-            blip = pic.find('.//p:blipFill/a:blip', NAMESPACES)
-            if blip is not None:
-                embed_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
+        # p:pic要素（画像）をZIPから読みながら逐次パースして検索
+        with zf.open(slide_path) as fp:
+            for pic in iter_pic_elements(fp):
+                # nvPicPr > cNvPr から名前と説明を取得
+                cNvPr = _find_cnvpr(pic)
+                shape_name = None
+                description = None
                 
-                if embed_id and embed_id in rel_map:
-                    # 相対パスを絶対パスに変換
-                    target = rel_map[embed_id]
-                    if target.startswith('..'):
-                        # ../media/image1.png → ppt/media/image1.png
-                        internal_path = os.path.normpath(os.path.join(slide_dir, target))
-                        internal_path = internal_path.replace('\\', '/')
-                    else:
-                        internal_path = f"ppt/{target}"
+                if cNvPr:
+                    shape_name = cNvPr[0].get('name')
+                    description = cNvPr[0].get('descr')
+                
+                # blipFill > blip から画像参照(rId)を取得
+                blip = _find_blip(pic)
+                if blip:
+                    embed_id = blip[0].get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
                     
-                    # 画像情報を更新または追加
-                    if internal_path in image_info_map:
-                        info = image_info_map[internal_path]
-                        if slide_number not in info.used_in_slides:
-                            info.used_in_slides.append(slide_number)
-                        # 元のファイル名の候補を更新（より良い情報があれば）
-                        if shape_name and not info.original_name:
-                            # shape_nameが画像ファイル名っぽければ採用
-                            if is_likely_filename(shape_name):
-                                info.original_name = shape_name
-                        if not info.shape_name:
-                            info.shape_name = shape_name
-                        if not info.description:
-                            info.description = description
-                            
+                    if embed_id and embed_id in rel_map:
+                        # 相対パスを絶対パスに変換
+                        target = rel_map[embed_id]
+                        if target.startswith('..'):
+                            # ../media/image1.png → ppt/media/image1.png
+                            internal_path = _join_posix(slide_dir, target)
+                        else:
+                            internal_path = f"ppt/{target}"
+                        
+                        refs.append((internal_path, slide_number, shape_name, description))
+                                
     except (KeyError, ET.ParseError) as e:
         pass
+    
+    return refs
+
+
+def merge_image_refs(image_info_map: Dict[str, ImageInfo], refs: List[ImageRef]) -> None:
+    """抽出した参照情報を画像情報に反映"""
+    for internal_path, slide_number, shape_name, description in refs:
+        info = image_info_map.get(internal_path)
+        if info is None:
+            continue
+        if slide_number not in info.used_in_slides:
+            info.used_in_slides.append(slide_number)
+        # 元のファイル名の候補を更新
+        if shape_name and not info.original_name:
+            if is_likely_filename(shape_name):
+                info.original_name = shape_name
+        if not info.shape_name:
+            info.shape_name = shape_name
+        if not info.description:
+            info.description = description
 
 
 def is_likely_filename(name: str) -> bool:
     """文字列がファイル名っぽいかどうかを判定"""
     if not name:
         return False
-    # 画像拡張子を含むか
-    image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.wmf', '.emf', '.svg']
-    name_lower = name.lower()
-    for ext in image_extensions:
-        if name_lower.endswith(ext):
-            return True
-    return False
+    # 画像拡張子で終わるか
+    return bool(_EXT_RE.search(name))
 
 
-def list_images_in_pptx(pptx_path: str) -> List[ImageInfo]:
+def list_images_in_pptx(pptx_path: str, hash_algo: str = DEFAULT_HASH_ALGO) -> List[ImageInfo]:
     """PPTXファイル内の全画像情報を取得"""
     
     if not os.path.exists(pptx_path):
@@ -152,41 +263,71 @@ def list_images_in_pptx(pptx_path: str) -> List[ImageInfo]:
     image_info_map: Dict[str, ImageInfo] = {}
     
     with zipfile.ZipFile(pptx_path, 'r') as zf:
-        # 1. まずppt/media/内の全画像を取得
-        for name in zf.namelist():
-            if name.startswith('ppt/media/'):
-                ext = os.path.splitext(name)[1].lower()
-                if ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.wmf', '.emf', '.svg']:
-                    data = zf.read(name)
-                    image_info_map[name] = ImageInfo(
-                        internal_path=name,
-                        internal_name=os.path.basename(name),
-                        size=len(data),
-                        md5_hash=calculate_hash(data),
-                    )
-        
-        # 2. 各スライドを解析して画像の使用状況と元ファイル名を取得
-        slide_pattern = re.compile(r'ppt/slides/slide(\d+)\.xml$')
+        # ZIP内のエントリを1回の走査で画像・スライド・マスター/レイアウトに振り分ける
+        media_infos = []
         slide_files = []
-        
-        for name in zf.namelist():
-            match = slide_pattern.match(name)
+        master_files = []
+        for info in zf.infolist():
+            name = info.filename
+            if name.startswith('ppt/media/'):
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    media_infos.append(info)
+                continue
+            match = _SLIDE_RE.match(name)
             if match:
-                slide_number = int(match.group(1))
-                slide_files.append((slide_number, name))
+                slide_files.append((int(match.group(1)), name))
+            elif ('slideMaster' in name or 'slideLayout' in name) and name.endswith('.xml') and '_rels' not in name:
+                master_files.append((0, name))
+        
+        # 1. まずppt/media/内の全画像を取得（サイズは中央ディレクトリの値を使い、読み込みはハッシュ用のみ）
+        for info in media_infos:
+            name = info.filename
+            image_info_map[name] = ImageInfo(
+                internal_path=name,
+                internal_name=os.path.basename(name),
+                size=info.file_size,
+                image_hash=calculate_hash(zf.read(info), hash_algo),
+                hash_algo=hash_algo,
+            )
         
-        # スライド番号順にソート
+        # 2. 各スライドを解析して画像の使用状況と元ファイル名を取得（スライド番号順）
         slide_files.sort(key=lambda x: x[0])
         
-        for slide_number, slide_path in slide_files:
-            extract_image_info_from_slide(zf, slide_path, slide_number, image_info_map)
+        # 3. スライドマスターやレイアウトも解析対象に加える
+        slide_files.extend(master_files)
+        
+        # 4. リレーションシップを先にまとめて読み込み、画像を参照しないパートは解析しない
+        rel_maps = {
+            slide_path: get_relationship_map(zf, rels_path_for(slide_path))
+            for _, slide_path in slide_files
+        }
+        slide_files = [(n, p) for n, p in slide_files if rel_maps[p]]
+        
+        # 5. 各スライドを並列に解析し、結果は順番通りにメインスレッドで反映
+        #    （ZipFileのインスタンスはスレッド間で共有できないため、ワーカースレッドごとに開く）
+        local = threading.local()
+        opened_zips: List[zipfile.ZipFile] = []
+        
+        def parse(slide_path: str, slide_number: int) -> List[ImageRef]:
+            worker_zf = getattr(local, 'zf', None)
+            if worker_zf is None:
+                worker_zf = local.zf = zipfile.ZipFile(pptx_path, 'r')
+                opened_zips.append(worker_zf)
+            return extract_image_info_from_slide(worker_zf, slide_path, slide_number,
+                                                 rel_maps[slide_path])
         
-        # 3. スライドマスターやレイアウトからも情報を取得
-        for name in zf.namelist():
-            if 'slideMaster' in name and name.endswith('.xml') and '_rels' not in name:
-                extract_image_info_from_slide(zf, name, 0, image_info_map)
-            elif 'slideLayout' in name and name.endswith('.xml') and '_rels' not in name:
-                extract_image_info_from_slide(zf, name, 0, image_info_map)
+        max_workers = max(1, min(os.cpu_count() or 1, len(slide_files)))
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(parse, slide_path, slide_number)
+                    for slide_number, slide_path in slide_files
+                ]
+                for future in futures:
+                    merge_image_refs(image_info_map, future.result())
+        finally:
+            for worker_zf in opened_zips:
+                worker_zf.close()
     
     # リストに変換してソート
     images = list(image_info_map.values())
@@ -209,8 +350,9 @@ def print_image_list(images: List[ImageInfo], pptx_path: str, verbose: bool = Fa
         return
     
     # ヘッダー
+    hash_label = f"{images[0].hash_algo.upper()}ハッシュ"
     if verbose:
-        print(f"{'No.':<4} {'内部ファイル名':<20} {'元のファイル名':<25} {'サイズ':<10} {'スライド':<12} {'MD5ハッシュ'}")
+        print(f"{'No.':<4} {'内部ファイル名':<20} {'元のファイル名':<25} {'サイズ':<10} {'スライド':<12} {hash_label}")
         print("-" * 110)
     else:
         print(f"{'No.':<4} {'内部ファイル名':<20} {'元のファイル名':<30} {'スライド'}")
@@ -221,7 +363,7 @@ def print_image_list(images: List[ImageInfo], pptx_path: str, verbose: bool = Fa
         slides = ",".join(map(str, sorted(img.used_in_slides))) if img.used_in_slides else "(未使用)"
         
         if verbose:
-            print(f"{i:<4} {img.internal_name:<20} {original:<25} {img.size:<10} {slides:<12} {img.md5_hash}")
+            print(f"{i:<4} {img.internal_name:<20} {original:<25} {img.size:<10} {slides:<12} {img.image_hash}")
         else:
             print(f"{i:<4} {img.internal_name:<20} {original:<30} {slides}")
     
@@ -248,7 +390,8 @@ def export_to_json(images: List[ImageInfo], output_path: str) -> None:
             "shape_name": img.shape_name,
             "description": img.description,
             "size": img.size,
-            "md5_hash": img.md5_hash,
+            # キー名はアルゴリズムに合わせる（既定は従来通り md5_hash、--fast-hash 指定時は xxh3_64_hash）
+            f"{img.hash_algo}_hash": img.image_hash,
             "used_in_slides": img.used_in_slides,
         })
     
@@ -277,11 +420,16 @@ def main():
                         help="詳細情報（サイズ、ハッシュ）も表示")
     parser.add_argument("--json", metavar="FILE", 
                         help="結果をJSONファイルに出力")
+    parser.add_argument("--fast-hash", action="store_true",
+                        help="MD5の代わりに高速なXXH3を使用（xxhashが必要。JSONのキーは xxh3_64_hash になる）")
     
     args = parser.parse_args()
+    if args.fast_hash and xxhash is None:
+        parser.error("--fast-hash を使うには xxhash をインストールしてください（pip install xxhash）")
     
     try:
-        images = list_images_in_pptx(args.pptx_file)
+        hash_algo = 'xxh3_64' if args.fast_hash else DEFAULT_HASH_ALGO
+        images = list_images_in_pptx(args.pptx_file, hash_algo)
         print_image_list(images, args.pptx_file, args.verbose)
         
         if args.json:
@@ -15,21 +15,60 @@ PPTX画像一括置換ツール - GUI版
 """
 
 import os
+import mmap
+import re
 import sys
 import shutil
+import tempfile
 import hashlib
+import struct
 import zipfile
-import tempfile
+import zlib
+import json
+import sqlite3
+import queue
 import threading
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List, Set, Tuple, Iterable, Iterator
+from contextlib import nullcontext
 from dataclasses import dataclass
+from functools import lru_cache
+
+# 画像の同一性判定は暗号強度不要のため、xxhashがあればXXH3を使う
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 # =============================================================================
 # Core Engine (画像マッチング・置換ロジック)
 # =============================================================================
 
-IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
-                    '.wmf', '.emf', '.svg', '.wdp']
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
+                              '.wmf', '.emf', '.svg', '.wdp'})
+
+# ZIP内の画像エントリの判定用（拡張子はドットなし・小文字で、splitextを使わずに照合する）
+_MEDIA_PREFIX = 'ppt/media/'
+_IMAGE_EXTS_NODOT = frozenset(ext[1:] for ext in IMAGE_EXTENSIONS)
+
+# PPTXファイル名（大文字小文字を区別しない）
+_PPTX_RE = re.compile(r'\.pptx$', re.IGNORECASE)
+
+# 既に圧縮済みで再圧縮しても縮まない画像形式（ZIP内では無圧縮で格納する）
+_STORED_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif'})
+_STORED_EXTS_NODOT = frozenset(ext[1:] for ext in _STORED_EXTENSIONS)
+
+# ファイルのハッシュ計算時の読み込み単位
+_HASH_CHUNK_SIZE = 1 << 20
+
+# 圧縮済みエントリをそのままコピーする際の読み込み単位
+_RAW_COPY_CHUNK_SIZE = 1 << 20
+
+# 1つのPPTX内で画像ハッシュを並列計算するスレッド数
+_HASH_WORKERS = 4
+
+# パイプラインスキャンで先読みしておくPPTXの数
+_PREFETCH_FILES = 4
 
 
 @dataclass
@@ -50,68 +89,485 @@ class ReplaceResult:
     message: str
 
 
+# 画像照合用のハッシュ方式（ディスクキャッシュのキーにも使う）
+_HASH_ALGO = 'xxh3_64' if xxhash is not None else 'md5'
+
+
+# MD5は未使用のハッシュオブジェクトを複製して使う（OpenSSL 3では生成のたびにアルゴリズムの
+# 検索が走るため）。暗号用途ではないので usedforsecurity=False を指定する（Python 3.9+）
+try:
+    _MD5_BASE = hashlib.md5(usedforsecurity=False)
+except TypeError:
+    _MD5_BASE = hashlib.md5()
+
+
+def _new_hasher():
+    """画像照合用のハッシュオブジェクトを生成（xxhashがあればXXH3、なければMD5）"""
+    if xxhash is not None:
+        return xxhash.xxh3_64()
+    return _MD5_BASE.copy()
+
+
 def calculate_file_hash(filepath: str) -> str:
-    """ファイルのMD5ハッシュを計算"""
-    hash_md5 = hashlib.md5()
+    """ファイルのハッシュを計算"""
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+ はバッファを再利用して読み込むfile_digestを使う
+            return hashlib.file_digest(f, _new_hasher).hexdigest()
+        # 読み込みバッファを使い回してチャンクごとのbytes生成を避ける
+        hasher = _new_hasher()
+        buf = bytearray(_HASH_CHUNK_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
 
 
 def calculate_bytes_hash(data: bytes) -> str:
-    """バイトデータのMD5ハッシュを計算"""
-    return hashlib.md5(data).hexdigest()
-
-
-def find_pptx_files(directory: str, recursive: bool = True) -> List[str]:
-    """指定ディレクトリ内のPPTXファイルを検索"""
-    pptx_files = []
-    if recursive:
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith('.pptx') and not file.startswith('~$'):
-                    pptx_files.append(os.path.join(root, file))
-    else:
-        for file in os.listdir(directory):
-            if file.lower().endswith('.pptx') and not file.startswith('~$'):
-                pptx_files.append(os.path.join(directory, file))
-    return sorted(pptx_files)
+    """バイトデータのハッシュを計算"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    hasher = _MD5_BASE.copy()
+    hasher.update(data)
+    return hasher.hexdigest()
+
 
+@lru_cache(maxsize=16)
+def _load_image_cached(abspath: str, mtime_ns: int, size: int) -> Tuple[bytes, str]:
+    """画像ファイルの内容とハッシュ（更新日時・サイズもキーにして変更時は読み直す）"""
+    with open(abspath, 'rb') as f:
+        data = f.read()
+    return data, calculate_bytes_hash(data)
 
-def scan_pptx_for_image(pptx_path: str, target_hash: str) -> List[MatchResult]:
-    """PPTXファイル内で対象画像をスキャン"""
+
+def _load_image(filepath: str) -> Tuple[bytes, str]:
+    """画像ファイルの内容とハッシュを取得（一括処理中は同じファイルを一度だけ読む）"""
+    st = os.stat(filepath)
+    return _load_image_cached(os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+
+def _walk(directory: str, recursive: bool = True):
+    """
+    ディレクトリ内のPPTXファイルのパスを順に返す
+    
+    DirEntryはディレクトリ読み取り時の種別情報を持つため、エントリごとのstatが不要。
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif _PPTX_RE.search(name) and not name.startswith('~$'):
+                        yield entry.path
+        except OSError:
+            # os.walkと同様、読み取れないディレクトリは飛ばす
+            continue
+
+
+def find_pptx_files(directory: str, recursive: bool = True) -> Iterator[str]:
+    """
+    指定ディレクトリ内のPPTXファイルを検索
+    
+    走査全体を待たずに見つかった順に返す（並べ替えが必要な場合は呼び出し側で行う）。
+    """
+    yield from _walk(directory, recursive)
+
+
+def _iter_media_images(zf: zipfile.ZipFile):
+    """ppt/media/内の画像エントリのZipInfoを列挙"""
+    for info in zf.infolist():
+        name = info.filename
+        if name.startswith(_MEDIA_PREFIX) and name.rpartition('.')[2].lower() in _IMAGE_EXTS_NODOT:
+            yield info
+
+
+@dataclass
+class PptxManifest:
+    """PPTX内の画像エントリ一覧（スキャン時に作成し、置換時にも再利用する）"""
+    path: str
+    mtime_ns: int
+    file_size: int
+    # 内部パス -> (展開後サイズ, CRC32, ハッシュ。未計算ならNone)
+    entries: Dict[str, Tuple[int, int, Optional[str]]]
+    
+    def matched_names(self, target_hash: str) -> List[str]:
+        """ハッシュが一致する画像エントリの内部パス"""
+        return [name for name, (_, _, file_hash) in self.entries.items() if file_hash == target_hash]
+
+
+# 同じPPTXをスキャン・置換で繰り返し解析しないためのキャッシュ（キーは絶対パス）
+_manifest_cache: Dict[str, PptxManifest] = {}
+
+
+class _DigestCache:
+    """
+    画像エントリ一覧のディスクキャッシュ（sqlite）
+    
+    PPTXの絶対パス・更新日時・サイズとハッシュ方式が一致すれば、前回の実行で
+    計算した一覧を再利用する。キャッシュの読み書きに失敗しても処理は続行する。
+    キャッシュを開けない（ディレクトリに書き込めないなど）場合は以降使わない。
+    """
+    
+    def __init__(self, db_path: str, enabled: bool = True):
+        self.db_path = db_path
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # プロセスプールのワーカーは親の接続を引き継がず、プロセスごとに接続する
+        if self._conn is None or self._pid != os.getpid():
+            try:
+                cache_dir = os.path.dirname(self.db_path)
+                os.makedirs(cache_dir, exist_ok=True)
+                if not os.access(cache_dir, os.W_OK):
+                    raise PermissionError(f"キャッシュディレクトリに書き込めません: {cache_dir}")
+                conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS digests ("
+                    "pptx_abspath TEXT PRIMARY KEY, hash_algo TEXT, "
+                    "mtime_ns INTEGER, size INTEGER, entries TEXT)"
+                )
+            except (sqlite3.Error, OSError):
+                self.enabled = False
+                raise
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+    
+    def get(self, key: str, mtime_ns: int, size: int) -> Optional[Dict[str, Tuple[int, int, Optional[str]]]]:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT entries FROM digests "
+                    "WHERE pptx_abspath = ? AND hash_algo = ? AND mtime_ns = ? AND size = ?",
+                    (key, _HASH_ALGO, mtime_ns, size)
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        if row is None:
+            return None
+        # 壊れた行や旧形式の行はキャッシュになかったものとして扱う
+        try:
+            entries = {name: tuple(value) for name, value in json.loads(row[0]).items()}
+        except (ValueError, TypeError, AttributeError):
+            return None
+        if not all(len(value) == 3 for value in entries.values()):
+            return None
+        return entries
+    
+    def put(self, key: str, manifest: PptxManifest) -> None:
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)",
+                        (key, _HASH_ALGO, manifest.mtime_ns, manifest.file_size,
+                         json.dumps(manifest.entries))
+                    )
+        except (sqlite3.Error, OSError):
+            pass
+
+
+# 環境変数 PPTX_REPLACER_NO_DISK_CACHE を設定するとディスクキャッシュを読み書きしない
+_digest_cache = _DigestCache(
+    os.path.join(os.path.expanduser("~"), ".cache", "pptx-replacer", "digests.sqlite3"),
+    enabled=not os.environ.get("PPTX_REPLACER_NO_DISK_CACHE")
+)
+
+
+def _hash_zip_entry(zf: zipfile.ZipFile, name: str) -> str:
+    """ZIPエントリを展開しながらハッシュを計算（エントリ全体をメモリに載せない）"""
+    hasher = _new_hasher()
+    with zf.open(name) as fp:
+        for chunk in iter(lambda: fp.read(_HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _pending_hashes(
+    entries: Dict[str, Tuple[int, int, Optional[str]]],
+    target_size: Optional[int],
+    target_crc: Optional[int] = None
+) -> List[str]:
+    """ハッシュ未計算で、計算が必要なエントリの内部パス"""
+    if target_size is None and target_crc is None:
+        return [name for name, (_, _, file_hash) in entries.items() if file_hash is None]
+    return [name for name, (size, crc, file_hash) in entries.items()
+            if file_hash is None
+            and (target_size is None or size == target_size)
+            and (target_crc is None or crc == target_crc)]
+
+
+class _MappedFile(mmap.mmap):
+    """ZipFileに渡せるメモリマップ（Python 3.12以前のmmapにはseekableがない）"""
+    
+    def seekable(self) -> bool:
+        return True
+
+
+def _map_file(path: str) -> mmap.mmap:
+    """ファイルを読み取り専用でメモリマップ（ページの読み込みはOSに任せ、bytesへのコピーを避ける）"""
+    with open(path, 'rb') as f:
+        return _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _cached_manifest(pptx_path: str, st: os.stat_result) -> Optional[PptxManifest]:
+    """更新日時・サイズが変わっていない場合に、キャッシュ済みの画像エントリ一覧を返す"""
+    key = os.path.abspath(pptx_path)
+    cached = _manifest_cache.get(key)
+    if cached is not None and (cached.mtime_ns != st.st_mtime_ns or cached.file_size != st.st_size):
+        cached = None
+    if cached is None:
+        # 前回の実行結果がディスクに残っていれば使う
+        disk_entries = _digest_cache.get(key, st.st_mtime_ns, st.st_size)
+        if disk_entries is not None:
+            cached = PptxManifest(pptx_path, st.st_mtime_ns, st.st_size, disk_entries)
+            _manifest_cache[key] = cached
+    return cached
+
+
+def _hash_entries_parallel(pptx_path: str, names: List[str]) -> List[str]:
+    """
+    複数のエントリのハッシュをスレッドで並列に計算（names と同じ順で返す）
+    
+    ZipFileのインスタンスはスレッド間で共有できない（ファイル位置や open() の管理情報を
+    共有する）ため、ワーカースレッドごとにPPTXをメモリマップして別々に開く。
+    同じファイルのマップはページキャッシュを共有するので、読み込みは重複しない。
+    """
+    local = threading.local()
+    opened: List[Tuple[zipfile.ZipFile, mmap.mmap]] = []
+    
+    def hash_entry(name: str) -> str:
+        worker_zf = getattr(local, 'zf', None)
+        if worker_zf is None:
+            worker_map = _map_file(pptx_path)
+            worker_zf = local.zf = zipfile.ZipFile(worker_map, 'r')
+            opened.append((worker_zf, worker_map))
+        return _hash_zip_entry(worker_zf, name)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(_HASH_WORKERS, len(names))) as executor:
+            return list(executor.map(hash_entry, names))
+    finally:
+        for worker_zf, worker_map in opened:
+            worker_zf.close()
+            worker_map.close()
+
+
+def _get_manifest(
+    pptx_path: str,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    mapped: Optional[mmap.mmap] = None,
+    stop_at_hash: Optional[str] = None
+) -> PptxManifest:
+    """
+    PPTXの画像エントリ一覧を取得
+    
+    target_size / target_crc を指定した場合は、中央ディレクトリ上のサイズ・CRC32が
+    一致するエントリだけを展開してハッシュを計算する（CRC32の衝突はハッシュで判別）。
+    PPTXの更新日時・サイズが変わっていなければ前回の結果を再利用する。
+    
+    Args:
+        mapped: メモリマップ済みのPPTX。指定した場合はファイルを開かずにこれを使う
+        stop_at_hash: 指定した場合はこのハッシュに一致するエントリが見つかった時点で
+                      残りのハッシュ計算を省く（未計算のエントリは必要になったときに計算）
+    """
+    st = os.stat(pptx_path)
+    key = os.path.abspath(pptx_path)
+    cached = _cached_manifest(pptx_path, st)
+    
+    if cached is not None:
+        pending = _pending_hashes(cached.entries, target_size, target_crc)
+        if not pending or (stop_at_hash is not None and cached.matched_names(stop_at_hash)):
+            return cached
+    
+    source = nullcontext(mapped) if mapped is not None else _map_file(pptx_path)
+    with source as fp, zipfile.ZipFile(fp, 'r') as zf:
+        if cached is not None:
+            entries = dict(cached.entries)
+        else:
+            # サイズとCRC32は中央ディレクトリから取得できるので展開不要
+            entries = {info.filename: (info.file_size, info.CRC, None)
+                       for info in _iter_media_images(zf)}
+            pending = _pending_hashes(entries, target_size, target_crc)
+        
+        # 展開とハッシュ計算が必要なエントリだけを、展開しながら逐次ハッシュする。
+        # 複数ある場合は、展開・ハッシュ計算がGILを解放するためスレッドで並列化する
+        if stop_at_hash is not None:
+            hashes = []
+            for name in pending:
+                hashes.append(_hash_zip_entry(zf, name))
+                if hashes[-1] == stop_at_hash:
+                    break
+        elif len(pending) > 1:
+            hashes = _hash_entries_parallel(pptx_path, pending)
+        else:
+            hashes = [_hash_zip_entry(zf, name) for name in pending]
+        for name, file_hash in zip(pending, hashes):
+            size, crc, _ = entries[name]
+            entries[name] = (size, crc, file_hash)
+    
+    manifest = PptxManifest(pptx_path, st.st_mtime_ns, st.st_size, entries)
+    _manifest_cache[key] = manifest
+    _digest_cache.put(key, manifest)
+    return manifest
+
+
+def scan_pptx_for_image(
+    pptx_path: str,
+    target_hash: str,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    collect_all: bool = True
+) -> List[MatchResult]:
+    """
+    PPTXファイル内で対象画像をスキャンし、一致した画像のみを返す
+    
+    全画像の一覧が必要な場合は enumerate_pptx_images を使う。
+    
+    Args:
+        target_size: 対象画像のバイトサイズ。指定するとサイズの異なる画像は
+                     展開・ハッシュ計算をせずに不一致とみなす
+        target_crc: 対象画像のCRC32。指定するとCRC32の異なる画像も同様に扱う
+        collect_all: Falseの場合は最初に一致した画像だけを返す（一致の有無だけ分かればよい場合）
+    """
     results = []
     
     try:
-        with zipfile.ZipFile(pptx_path, 'r') as zf:
-            for name in zf.namelist():
-                if name.startswith('ppt/media/'):
-                    ext = os.path.splitext(name)[1].lower()
-                    if ext in IMAGE_EXTENSIONS:
-                        data = zf.read(name)
-                        file_hash = calculate_bytes_hash(data)
-                        matched = (file_hash == target_hash)
-                        results.append(MatchResult(
-                            pptx_path=pptx_path,
-                            internal_image_path=name,
-                            internal_image_name=os.path.basename(name),
-                            matched=matched
-                        ))
+        manifest = _get_manifest(pptx_path, target_size, target_crc,
+                                 stop_at_hash=None if collect_all else target_hash)
+        matched_names = manifest.matched_names(target_hash)
+        if not collect_all:
+            matched_names = matched_names[:1]
+        for name in matched_names:
+            results.append(MatchResult(
+                pptx_path=pptx_path,
+                internal_image_path=name,
+                internal_image_name=os.path.basename(name),
+                matched=True
+            ))
     except Exception:
         pass
     
     return results
 
 
+def enumerate_pptx_images(pptx_path: str) -> List[Tuple[str, int, Optional[str]]]:
+    """PPTX内の全画像を (内部パス, サイズ, ハッシュ) のタプルで列挙"""
+    entries = _get_manifest(pptx_path).entries
+    return [(name, size, file_hash) for name, (size, _, file_hash) in entries.items()]
+
+
+def _copy_zip_entry_raw(
+    zf_in: zipfile.ZipFile,
+    zf_out: zipfile.ZipFile,
+    info: zipfile.ZipInfo
+) -> None:
+    """エントリを展開・再圧縮せず、圧縮済みのバイト列のまま出力ZIPへコピー"""
+    # ローカルファイルヘッダーを読み飛ばして圧縮データの先頭へ移動
+    fp = zf_in.fp
+    fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+    
+    out_info = zipfile.ZipInfo(info.filename, info.date_time)
+    out_info.compress_type = info.compress_type
+    # データディスクリプタは使わず、サイズとCRCをローカルヘッダーに書く
+    out_info.flag_bits = info.flag_bits & ~0x08
+    out_info.CRC = info.CRC
+    out_info.compress_size = info.compress_size
+    out_info.file_size = info.file_size
+    out_info.create_system = info.create_system
+    out_info.external_attr = info.external_attr
+    
+    zf_out.fp.seek(zf_out.start_dir)
+    out_info.header_offset = zf_out.fp.tell()
+    zf_out.fp.write(out_info.FileHeader())
+    # 大きなエントリでも全体をメモリに載せないよう、圧縮データを分割してコピー
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = fp.read(min(remaining, _RAW_COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"圧縮データが途中で終わっています: {info.filename}")
+        zf_out.fp.write(chunk)
+        remaining -= len(chunk)
+    zf_out.filelist.append(out_info)
+    zf_out.NameToInfo[out_info.filename] = out_info
+    zf_out.start_dir = zf_out.fp.tell()
+    zf_out._didModify = True
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    バックアップ用にファイルを複製（可能ならハードリンクでデータをコピーしない）
+    
+    置換結果は別ファイルに書いてから os.replace で差し替えるため、元のファイルの
+    中身が書き換わることはなく、ハードリンクでもバックアップは元の内容のまま残る。
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        # 別ドライブ・ハードリンク非対応のファイルシステムなど
+        shutil.copy2(src, dst)
+
+
+def _write_entry(zf_out: zipfile.ZipFile, src_info: zipfile.ZipInfo, data: bytes) -> None:
+    """
+    エントリを書き込み（圧縮済み画像は無圧縮、それ以外は速度優先のレベル1で圧縮）
+    
+    元エントリの更新日時と属性は引き継ぐ。
+    """
+    name = src_info.filename
+    zi = zipfile.ZipInfo(name, date_time=src_info.date_time)
+    zi.external_attr = src_info.external_attr
+    if name.startswith(_MEDIA_PREFIX) and name.rpartition('.')[2].lower() in _STORED_EXTS_NODOT:
+        zi.compress_type = zipfile.ZIP_STORED
+        zf_out.writestr(zi, data)
+    else:
+        zi.compress_type = zipfile.ZIP_DEFLATED
+        zf_out.writestr(zi, data, compresslevel=1)
+
+
 def replace_image_in_pptx(
     pptx_path: str,
     target_hash: str,
     replacement_image_path: str,
     output_path: Optional[str] = None,
-    backup: bool = True
+    backup: bool = True,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    matching_names: Optional[Set[str]] = None
 ) -> ReplaceResult:
-    """PPTXファイル内の画像を置換"""
+    """
+    PPTXファイル内の画像を置換
+    
+    置換対象はスキャン時に作成した画像エントリ一覧から決めるため、
+    スキャン後に変更されていなければ画像の展開・ハッシュ計算は行わない。
+    
+    Args:
+        target_size, target_crc: 対象画像のサイズとCRC32（scan_pptx_for_image と同じ値を渡す）
+        matching_names: スキャンで一致した内部パス。スキャン後にPPTXが変更されていなければ
+                        （更新日時・サイズがキャッシュと一致し、これらが対象のハッシュを持てば）
+                        ハッシュを照合せずこれらのエントリをそのまま置き換える
+    """
     
     if not os.path.exists(pptx_path):
         return ReplaceResult(pptx_path, False, 0, "ファイルが見つかりません")
@@ -119,46 +575,175 @@ def replace_image_in_pptx(
     if not os.path.exists(replacement_image_path):
         return ReplaceResult(pptx_path, False, 0, "置換用画像が見つかりません")
     
-    with open(replacement_image_path, 'rb') as f:
-        replacement_data = f.read()
+    # 一括置換では2ファイル目以降キャッシュを再利用
+    replacement_data, _ = _load_image(replacement_image_path)
     
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_pptx = os.path.join(temp_dir, 'temp.pptx')
-        replaced_count = 0
+    replaced_count = 0
+    
+    try:
+        matched_names = None
+        if matching_names is not None:
+            # スキャン後に編集・再保存されていれば、同じ内部パスが別の画像を指している
+            # 可能性があるため、現在のPPTXのキャッシュで確かめてから使う
+            cached = _cached_manifest(pptx_path, os.stat(pptx_path))
+            if cached is not None and set(matching_names) <= set(cached.matched_names(target_hash)):
+                matched_names = set(matching_names)
+        if matched_names is None:
+            manifest = _get_manifest(pptx_path, target_size, target_crc)
+            matched_names = set(manifest.matched_names(target_hash))
+        if not matched_names:
+            return ReplaceResult(pptx_path, True, 0, "マッチする画像なし")
         
+        final_path = output_path if output_path else pptx_path
+        out_dir = os.path.dirname(os.path.abspath(final_path))
+        os.makedirs(out_dir, exist_ok=True)
+        
+        # 出力先と同じディレクトリに一時ファイルを作り、完成後に名前を置き換える
+        temp = tempfile.NamedTemporaryFile(dir=out_dir, suffix='.pptx.tmp', delete=False)
         try:
-            with zipfile.ZipFile(pptx_path, 'r') as zf_in:
-                with zipfile.ZipFile(temp_pptx, 'w', zipfile.ZIP_DEFLATED) as zf_out:
-                    for item in zf_in.namelist():
-                        data = zf_in.read(item)
-                        
-                        if item.startswith('ppt/media/'):
-                            ext = os.path.splitext(item)[1].lower()
-                            if ext in IMAGE_EXTENSIONS:
-                                file_hash = calculate_bytes_hash(data)
-                                if file_hash == target_hash:
-                                    data = replacement_data
-                                    replaced_count += 1
-                        
-                        zf_out.writestr(item, data)
+            with temp, zipfile.ZipFile(pptx_path, 'r') as zf_in:
+                with zipfile.ZipFile(temp, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf_out:
+                    for info in zf_in.infolist():
+                        if info.filename in matched_names:
+                            _write_entry(zf_out, info, replacement_data)
+                            replaced_count += 1
+                        else:
+                            # 変更しないエントリは圧縮済みデータをそのままコピー
+                            _copy_zip_entry_raw(zf_in, zf_out, info)
             
-            if replaced_count > 0:
-                if backup and output_path is None:
-                    backup_path = pptx_path + '.backup'
-                    if not os.path.exists(backup_path):
-                        shutil.copy2(pptx_path, backup_path)
-                
-                final_path = output_path if output_path else pptx_path
-                if output_path:
-                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                shutil.copy2(temp_pptx, final_path)
-                
-                return ReplaceResult(pptx_path, True, replaced_count, f"{replaced_count}個の画像を置換")
+            if backup and output_path is None:
+                backup_path = pptx_path + '.backup'
+                if not os.path.exists(backup_path):
+                    _link_or_copy(pptx_path, backup_path)
+            
+            # 一時ファイルは0600で作られるため元ファイルの権限に揃える
+            shutil.copymode(pptx_path, temp.name)
+            os.replace(temp.name, final_path)
+        except BaseException:
+            if os.path.exists(temp.name):
+                os.remove(temp.name)
+            raise
+        
+        return ReplaceResult(pptx_path, True, replaced_count, f"{replaced_count}個の画像を置換")
+            
+    except Exception as e:
+        return ReplaceResult(pptx_path, False, 0, f"エラー: {str(e)}")
+
+
+def scan_many_pipelined(
+    pptx_files: Iterable[str],
+    target_hash: str,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    n_workers: int = _HASH_WORKERS,
+    collect_all: bool = True
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    複数のPPTXをパイプラインでスキャンし、(パス, 一致した内部パス) を完了順に返す
+    
+    読み込みスレッドがPPTXを先読みしてキューに積み、ワーカースレッドが展開・
+    ハッシュ計算を行うことで、ディスクの読み込み待ちとCPU処理を重ねる。
+    展開（zlib）とハッシュ計算はGILを解放するため、PPTXの内容をプロセス間で
+    受け渡さずに済むスレッドで並列化する。キャッシュで判定できるPPTXは読み込まない。
+    collect_all=False の場合、一致した内部パスはPPTXごとに最初の1つだけを返す。
+    呼び出し側が途中で反復をやめた場合は、残りのPPTXを読み込まずにスレッドを終了させる。
+    """
+    # 先読みするPPTXの数を制限する
+    in_queue: queue.Queue = queue.Queue(maxsize=_PREFETCH_FILES)
+    out_queue: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    
+    def reader():
+        try:
+            for pptx_path in pptx_files:
+                if stop.is_set():
+                    break
+                mapped = None
+                try:
+                    cached = _cached_manifest(pptx_path, os.stat(pptx_path))
+                    if cached is None or _pending_hashes(cached.entries, target_size, target_crc):
+                        # bytesに読み込まずメモリマップし、OSにバックグラウンドで先読みさせる
+                        mapped = _map_file(pptx_path)
+                        if hasattr(mmap, 'MADV_WILLNEED'):
+                            mapped.madvise(mmap.MADV_WILLNEED)
+                except (OSError, ValueError):
+                    pass
+                in_queue.put((pptx_path, mapped))
+        finally:
+            for _ in range(n_workers):
+                in_queue.put(None)
+    
+    def worker():
+        while True:
+            item = in_queue.get()
+            if item is None:
+                out_queue.put(None)
+                return
+            pptx_path, mapped = item
+            if stop.is_set():
+                # 中断後はキューに残ったPPTXを処理せず、マップを閉じて読み捨てる
+                if mapped is not None:
+                    mapped.close()
+                continue
+            try:
+                manifest = _get_manifest(pptx_path, target_size, target_crc, mapped,
+                                         stop_at_hash=None if collect_all else target_hash)
+                matched_names = manifest.matched_names(target_hash)
+                if not collect_all:
+                    matched_names = matched_names[:1]
+            except Exception:
+                matched_names = []
+            finally:
+                if mapped is not None:
+                    mapped.close()
+            out_queue.put((pptx_path, matched_names))
+    
+    threads = [threading.Thread(target=reader, daemon=True)]
+    threads += [threading.Thread(target=worker, daemon=True) for _ in range(n_workers)]
+    for thread in threads:
+        thread.start()
+    
+    try:
+        finished = 0
+        while finished < n_workers:
+            item = out_queue.get()
+            if item is None:
+                finished += 1
             else:
-                return ReplaceResult(pptx_path, True, 0, "マッチする画像なし")
-                
-        except Exception as e:
-            return ReplaceResult(pptx_path, False, 0, f"エラー: {str(e)}")
+                yield item
+    finally:
+        # 途中で反復をやめた場合（GeneratorExit）も、読み込みスレッドとワーカーが
+        # キューを空にして終了できるよう停止を知らせる
+        stop.set()
+        while True:
+            try:
+                item = out_queue.get_nowait()
+            except queue.Empty:
+                break
+
+
+def _replace_in_worker(
+    pptx_path: str,
+    target_hash: str,
+    replacement_image_path: str,
+    output_path: Optional[str],
+    backup: bool,
+    matching_names: Optional[List[str]],
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None
+) -> ReplaceResult:
+    """
+    ワーカーで置換を実行（スキャンで一致したエントリだけを置き換える）
+    
+    matching_names が None の場合（一致の有無だけを調べた高速スキャンの後など）や、
+    スキャン後にPPTXが変更されていた場合は、target_size / target_crc で絞り込みながら
+    一致するエントリを探し直す。
+    """
+    return replace_image_in_pptx(
+        pptx_path, target_hash, replacement_image_path, output_path, backup,
+        target_size, target_crc,
+        matching_names=set(matching_names) if matching_names is not None else None
+    )
 
 
 # =============================================================================
@@ -184,6 +769,14 @@ except ImportError:
     sys.exit(1)
 
 
+# ワーカースレッドからのUI更新をまとめて反映する間隔と、1回で処理する最大件数
+_UI_POLL_INTERVAL_MS = 50
+_UI_MAX_ITEMS_PER_TICK = 500
+
+# 一括置換でファイルを並列処理するスレッド数
+_REPLACE_WORKERS = min(8, os.cpu_count() or 1)
+
+
 class ImagePreviewFrame(ttk.LabelFrame):
     """画像プレビュー付きファイル選択フレーム"""
     
@@ -191,6 +784,11 @@ class ImagePreviewFrame(ttk.LabelFrame):
         super().__init__(parent, text=title, **kwargs)
         self.filepath = tk.StringVar()
         self.preview_size = (120, 90)
+        self._preview_token = 0
+        # 世代番号 -> 読み込み結果（後から終わった古い読み込みが新しい結果を上書きしないよう分ける）
+        self._preview_results: Dict[int, tuple] = {}
+        self._preview_pending: Optional[int] = None
+        self._preview_polling = False
         self._create_widgets()
     
     def _create_widgets(self):
@@ -231,27 +829,67 @@ class ImagePreviewFrame(ttk.LabelFrame):
     
     def _update_preview(self):
         path = self.filepath.get()
+        # 入力途中の古い読み込み結果を捨てるための世代番号
+        self._preview_token += 1
         
         if not path or not os.path.exists(path):
+            self._preview_pending = None
+            self._preview_results.clear()
             self.preview_label.configure(image='', text="画像を選択してください")
             self.info_label.configure(text="")
             return
         
+        # 画像の読み込み・縮小はワーカースレッドで行い、メインスレッドは結果を待つだけにする
+        self.preview_label.configure(text="読み込み中...")
+        self._preview_pending = self._preview_token
+        threading.Thread(target=self._load_preview_async,
+                         args=(self._preview_token, path), daemon=True).start()
+        if not self._preview_polling:
+            self._preview_polling = True
+            self.after(30, self._poll_preview)
+    
+    def _load_preview_async(self, token: int, path: str):
+        """ワーカースレッドでプレビュー画像を作成（Tkには触れない）"""
         try:
-            img = Image.open(path)
-            img.thumbnail(self.preview_size, Image.Resampling.LANCZOS)
-            
-            self.photo = ImageTk.PhotoImage(img)
-            self.preview_label.configure(image=self.photo, text="")
-            
+            with Image.open(path) as img:
+                width, height = img.size
+                # JPEGはデコード時に縮小させて展開量を減らす
+                img.draft('RGB', self.preview_size)
+                img.thumbnail(self.preview_size, Image.Resampling.LANCZOS)
             size = os.path.getsize(path)
-            img_full = Image.open(path)
-            info_text = f"{img_full.width}x{img_full.height} | {size:,} bytes | {os.path.basename(path)}"
-            self.info_label.configure(text=info_text)
-            
+            result = (path, img, width, height, size, None)
         except Exception as e:
-            self.preview_label.configure(image='', text=f"プレビュー不可\n{str(e)}")
+            result = (path, None, 0, 0, 0, e)
+        # 既に新しい読み込みが始まっていれば結果は捨てる
+        if token == self._preview_token:
+            self._preview_results[token] = result
+    
+    def _poll_preview(self):
+        if self._preview_pending is None:
+            self._preview_polling = False
+            return
+        result = self._preview_results.pop(self._preview_pending, None)
+        if result is None:
+            self.after(30, self._poll_preview)
+            return
+        # 判定と格納の間に世代が進んで残った古い結果も、ここでまとめて捨てる
+        self._preview_results.clear()
+        self._preview_pending = None
+        self._preview_polling = False
+        self._apply_preview(*result)
+    
+    def _apply_preview(self, path: str, img, width: int, height: int, size: int,
+                       error: Optional[Exception]):
+        """メインスレッドでプレビューを表示（PhotoImageの作成はここで行う）"""
+        if error is not None:
+            self.preview_label.configure(image='', text=f"プレビュー不可\n{str(error)}")
             self.info_label.configure(text="")
+            return
+        
+        self.photo = ImageTk.PhotoImage(img)
+        self.preview_label.configure(image=self.photo, text="")
+        info_text = f"{width}x{height} | {size:,} bytes | {os.path.basename(path)}"
+        self.info_label.configure(text=info_text)
     
     def get_path(self) -> str:
         return self.filepath.get()
@@ -259,7 +897,7 @@ class ImagePreviewFrame(ttk.LabelFrame):
     def get_hash(self) -> Optional[str]:
         path = self.filepath.get()
         if path and os.path.exists(path):
-            return calculate_file_hash(path)
+            return _load_image(path)[1]
         return None
 
 
@@ -270,6 +908,7 @@ class FolderSelectFrame(ttk.LabelFrame):
         super().__init__(parent, text=title, **kwargs)
         self.folderpath = tk.StringVar()
         self.recursive = tk.BooleanVar(value=True)
+        self.fast_scan = tk.BooleanVar(value=False)
         self._create_widgets()
     
     def _create_widgets(self):
@@ -288,6 +927,10 @@ class FolderSelectFrame(ttk.LabelFrame):
         recursive_check = ttk.Checkbutton(option_frame, text="サブフォルダも検索", 
                                           variable=self.recursive)
         recursive_check.pack(side=tk.LEFT)
+        
+        fast_check = ttk.Checkbutton(option_frame, text="高速スキャン（重複を数えない）",
+                                     variable=self.fast_scan)
+        fast_check.pack(side=tk.LEFT, padx=(20, 0))
     
     def _browse_folder(self):
         path = filedialog.askdirectory()
@@ -299,6 +942,9 @@ class FolderSelectFrame(ttk.LabelFrame):
     
     def is_recursive(self) -> bool:
         return self.recursive.get()
+    
+    def is_fast_scan(self) -> bool:
+        return self.fast_scan.get()
 
 
 class ResultTreeView(ttk.Frame):
@@ -312,10 +958,11 @@ class ResultTreeView(ttk.Frame):
         columns = ("status", "file", "matches", "message")
         self.tree = ttk.Treeview(self, columns=columns, show="headings", height=10)
         
-        self.tree.heading("status", text="状態")
-        self.tree.heading("file", text="ファイル")
-        self.tree.heading("matches", text="マッチ数")
-        self.tree.heading("message", text="メッセージ")
+        # 結果は完了順に追加されるため、見出しのクリックで並べ替えられるようにする
+        for column, text in (("status", "状態"), ("file", "ファイル"),
+                             ("matches", "マッチ数"), ("message", "メッセージ")):
+            self.tree.heading(column, text=text,
+                              command=lambda c=column: self.sort_by(c, False))
         
         self.tree.column("status", width=60, anchor=tk.CENTER)
         self.tree.column("file", width=300)
@@ -337,10 +984,25 @@ class ResultTreeView(ttk.Frame):
         for item in self.tree.get_children():
             self.tree.delete(item)
     
-    def add_scan_result(self, pptx_path: str, match_count: int):
+    def sort_by(self, column: str, reverse: bool):
+        """指定した列で行を並べ替え（もう一度クリックすると逆順）"""
+        if column == "matches":
+            key = lambda item: int(self.tree.set(item, column))
+        else:
+            key = lambda item: self.tree.set(item, column)
+        for index, item in enumerate(sorted(self.tree.get_children(), key=key, reverse=reverse)):
+            self.tree.move(item, "", index)
+        self.tree.heading(column, command=lambda: self.sort_by(column, not reverse))
+    
+    def add_scan_result(self, pptx_path: str, match_count: int, counted: bool = True):
         status = "✓" if match_count > 0 else "−"
         filename = os.path.basename(pptx_path)
-        message = f"{match_count}個の画像がマッチ" if match_count > 0 else "マッチなし"
+        if match_count == 0:
+            message = "マッチなし"
+        elif counted:
+            message = f"{match_count}個の画像がマッチ"
+        else:
+            message = "マッチあり（重複は未集計）"
         self.tree.insert("", tk.END, values=(status, filename, match_count, message))
     
     def add_replace_result(self, result: ReplaceResult):
@@ -363,11 +1025,20 @@ class PPTXImageReplacerApp:
         self.root.geometry("750x700")
         self.root.minsize(650, 600)
         
-        self.scan_results: Dict[str, int] = {}
+        # PPTXパス -> スキャンで一致した画像の内部パス
+        self.scan_results: Dict[str, List[str]] = {}
+        # Falseの場合、scan_resultsにはPPTXごとに最初の一致だけが入っている（高速スキャン）
+        self.scan_collect_all = True
         self.is_processing = False
         
+        # ワーカースレッドからのUI更新（ファイルごとにroot.afterを呼ぶとTkが詰まるため）
+        self._ui_queue: "queue.Queue[tuple]" = queue.Queue()
+        # 一括置換用のスレッドプール（置換のたびに作り直さず使い回す）
+        self._replace_executor = ThreadPoolExecutor(max_workers=_REPLACE_WORKERS)
+        
         self._create_widgets()
         self._create_menu()
+        self.root.after(_UI_POLL_INTERVAL_MS, self._drain_ui_queue)
     
     def _create_menu(self):
         menubar = tk.Menu(self.root)
@@ -522,6 +1193,9 @@ class PPTXImageReplacerApp:
         self.result_tree.clear()
         self.scan_results.clear()
         self.progress_var.set(0)
+        # ファイル数は走査しながら判明するため、スキャン中は進捗を不定表示にする
+        self.progress_bar.configure(mode='indeterminate')
+        self.progress_bar.start(10)
         self.status_var.set("スキャン中...")
         
         thread = threading.Thread(target=self._scan_worker)
@@ -530,52 +1204,83 @@ class PPTXImageReplacerApp:
     
     def _scan_worker(self):
         try:
-            source_hash = self.source_image.get_hash()
+            # サイズとCRC32でZIPの中央ディレクトリ上で候補を絞り込む
+            source_data, source_hash = _load_image(self.source_image.get_path())
+            source_size = len(source_data)
+            source_crc = zlib.crc32(source_data)
             folder_path = self.folder_select.get_path()
             recursive = self.folder_select.is_recursive()
+            # 高速スキャンでは一致の有無だけを調べ、最初の一致で残りのハッシュ計算を省く
+            collect_all = not self.folder_select.is_fast_scan()
+            self.scan_collect_all = collect_all
             
+            # 走査の完了を待たず、見つかったファイルから順にスキャンする
             pptx_files = find_pptx_files(folder_path, recursive)
-            total = len(pptx_files)
-            
-            if total == 0:
-                self.root.after(0, lambda: self._scan_complete(0, 0))
-                return
             
             matched_files = 0
             total_matches = 0
             
-            for i, pptx_path in enumerate(pptx_files):
-                results = scan_pptx_for_image(pptx_path, source_hash)
-                match_count = sum(1 for r in results if r.matched)
-                
-                self.scan_results[pptx_path] = match_count
+            # 読み込みスレッドとハッシュ計算スレッドのパイプラインでスキャン
+            scanned = scan_many_pipelined(pptx_files, source_hash, source_size, source_crc,
+                                          collect_all=collect_all)
+            for i, (pptx_path, matched_names) in enumerate(scanned):
+                # 一致した内部パスは置換時にそのまま使う
+                self.scan_results[pptx_path] = matched_names
+                match_count = len(matched_names)
                 
                 if match_count > 0:
                     matched_files += 1
                     total_matches += match_count
                 
-                progress = (i + 1) / total * 100
-                self.root.after(0, lambda p=progress, pp=pptx_path, mc=match_count: 
-                               self._update_scan_progress(p, pp, mc))
+                self._ui_queue.put(('scan', i + 1, pptx_path, match_count, collect_all))
             
-            self.root.after(0, lambda: self._scan_complete(matched_files, total_matches))
+            self._ui_queue.put(('call', self._scan_complete, (matched_files, total_matches)))
             
         except Exception as e:
-            self.root.after(0, lambda: self._scan_error(str(e)))
+            self._ui_queue.put(('call', self._scan_error, (str(e),)))
+    
+    def _drain_ui_queue(self):
+        """ワーカーからの更新をまとめて反映し、進捗表示は最後の値だけ更新する"""
+        progress = None
+        scanned = None
+        try:
+            for _ in range(_UI_MAX_ITEMS_PER_TICK):
+                kind, *args = self._ui_queue.get_nowait()
+                if kind == 'scan':
+                    scanned, pptx_path, match_count, counted = args
+                    self.result_tree.add_scan_result(pptx_path, match_count, counted)
+                elif kind == 'replace':
+                    progress, result = args
+                    self.result_tree.add_replace_result(result)
+                else:
+                    func, func_args = args
+                    func(*func_args)
+        except queue.Empty:
+            pass
+        
+        if progress is not None:
+            self.progress_var.set(progress)
+            self.progress_label.configure(text=f"{int(progress)}%")
+        elif scanned is not None:
+            # スキャン中は総数が分からないため処理済みの件数を表示
+            self.progress_label.configure(text=f"{scanned}件")
+        self.root.after(_UI_POLL_INTERVAL_MS, self._drain_ui_queue)
     
-    def _update_scan_progress(self, progress: float, pptx_path: str, match_count: int):
-        self.progress_var.set(progress)
-        self.progress_label.configure(text=f"{int(progress)}%")
-        self.result_tree.add_scan_result(pptx_path, match_count)
+    def _stop_indeterminate_progress(self, value: float):
+        self.progress_bar.stop()
+        self.progress_bar.configure(mode='determinate')
+        self.progress_var.set(value)
     
     def _scan_complete(self, matched_files: int, total_matches: int):
         self.is_processing = False
         self.scan_btn.configure(state=tk.NORMAL)
+        self._stop_indeterminate_progress(100)
         
         total_files = len(self.scan_results)
-        self.summary_label.configure(
-            text=f"スキャン完了: {total_files}ファイル中 {matched_files}ファイルでマッチ（計{total_matches}画像）"
-        )
+        summary = f"スキャン完了: {total_files}ファイル中 {matched_files}ファイルでマッチ"
+        if self.scan_collect_all:
+            summary += f"（計{total_matches}画像）"
+        self.summary_label.configure(text=summary)
         
         if matched_files > 0:
             self.replace_btn.configure(state=tk.NORMAL)
@@ -586,6 +1291,7 @@ class PPTXImageReplacerApp:
     def _scan_error(self, error_msg: str):
         self.is_processing = False
         self.scan_btn.configure(state=tk.NORMAL)
+        self._stop_indeterminate_progress(0)
         self.status_var.set(f"エラー発生: {error_msg}")
         print(f"スキャンエラー: {error_msg}")
     
@@ -593,10 +1299,13 @@ class PPTXImageReplacerApp:
         if self.is_processing:
             return
 
-        matched_files = sum(1 for c in self.scan_results.values() if c > 0)
-        total_matches = sum(self.scan_results.values())
+        matched_files = sum(1 for names in self.scan_results.values() if names)
+        total_matches = sum(len(names) for names in self.scan_results.values())
 
-        msg = f"{matched_files}ファイル内の{total_matches}画像を置換します。"
+        if self.scan_collect_all:
+            msg = f"{matched_files}ファイル内の{total_matches}画像を置換します。"
+        else:
+            msg = f"{matched_files}ファイル内の一致する画像を置換します。"
         print(msg)
         self.status_var.set(msg)
         
@@ -613,7 +1322,7 @@ class PPTXImageReplacerApp:
     
     def _replace_worker(self):
         try:
-            source_hash = self.source_image.get_hash()
+            source_data, source_hash = _load_image(self.source_image.get_path())
             target_path = self.target_image.get_path()
             backup = self.backup_var.get()
             
@@ -621,40 +1330,49 @@ class PPTXImageReplacerApp:
             output_base = self.output_folder.get() if use_separate_output else None
             source_base = self.folder_select.get_path()
             
-            target_files = [(p, c) for p, c in self.scan_results.items() if c > 0]
+            target_files = [(p, names) for p, names in self.scan_results.items() if names]
             total = len(target_files)
             
             success_count = 0
             total_replaced = 0
             
-            for i, (pptx_path, _) in enumerate(target_files):
+            # ファイル単位で独立しているため並列に置換する。ZIPの読み書きと圧縮はGILを
+            # 解放するのでスレッドで足り、置換用画像のキャッシュもスレッド間で共有できる
+            futures = []
+            for pptx_path, matched_names in target_files:
                 if output_base:
                     rel_path = os.path.relpath(pptx_path, source_base)
                     output_path = os.path.join(output_base, rel_path)
                 else:
                     output_path = None
                 
-                result = replace_image_in_pptx(
-                    pptx_path, source_hash, target_path, output_path, backup
-                )
+                if self.scan_collect_all:
+                    # スキャンで一致した内部パスを渡し、置換時の再照合を省く
+                    futures.append(self._replace_executor.submit(
+                        _replace_in_worker, pptx_path, source_hash, target_path,
+                        output_path, backup, matched_names, len(source_data), zlib.crc32(source_data)
+                    ))
+                else:
+                    # 高速スキャンでは最初の一致しか分かっていないため、置換時に探し直す
+                    futures.append(self._replace_executor.submit(
+                        _replace_in_worker, pptx_path, source_hash, target_path,
+                        output_path, backup, None, len(source_data), zlib.crc32(source_data)
+                    ))
+            
+            for i, future in enumerate(as_completed(futures)):
+                result = future.result()
                 
                 if result.success and result.replaced_count > 0:
                     success_count += 1
                     total_replaced += result.replaced_count
                 
                 progress = (i + 1) / total * 100
-                self.root.after(0, lambda p=progress, r=result: 
-                               self._update_replace_progress(p, r))
+                self._ui_queue.put(('replace', progress, result))
             
-            self.root.after(0, lambda: self._replace_complete(success_count, total_replaced))
+            self._ui_queue.put(('call', self._replace_complete, (success_count, total_replaced)))
             
         except Exception as e:
-            self.root.after(0, lambda: self._replace_error(str(e)))
-    
-    def _update_replace_progress(self, progress: float, result: ReplaceResult):
-        self.progress_var.set(progress)
-        self.progress_label.configure(text=f"{int(progress)}%")
-        self.result_tree.add_replace_result(result)
+            self._ui_queue.put(('call', self._replace_error, (str(e),)))
     
     def _replace_complete(self, success_count: int, total_replaced: int):
         self.is_processing = False
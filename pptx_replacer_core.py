@@ -7,17 +7,57 @@ GUIからもCLIからも利用可能です。
 """
 
 import os
+import mmap
+import re
 import shutil
+import tempfile
 import hashlib
+import struct
+import queue
+import threading
 import zipfile
-import tempfile
-from typing import Optional, List, Dict
+import zlib
+import json
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, List, Dict, Set, Tuple, Iterable, Iterator
+from contextlib import nullcontext
 from dataclasses import dataclass
+from functools import lru_cache
+
+# 画像の同一性判定は暗号強度不要のため、xxhashがあればXXH3を使う
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 
 # サポートする画像拡張子
-IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
-                    '.wmf', '.emf', '.svg', '.wdp']
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.tif',
+                              '.wmf', '.emf', '.svg', '.wdp'})
+
+# ZIP内の画像エントリの判定用（拡張子はドットなし・小文字で、splitextを使わずに照合する）
+_MEDIA_PREFIX = 'ppt/media/'
+_IMAGE_EXTS_NODOT = frozenset(ext[1:] for ext in IMAGE_EXTENSIONS)
+
+# PPTXファイル名（大文字小文字を区別しない）
+_PPTX_RE = re.compile(r'\.pptx$', re.IGNORECASE)
+
+# 既に圧縮済みで再圧縮しても縮まない画像形式（ZIP内では無圧縮で格納する）
+_STORED_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif'})
+_STORED_EXTS_NODOT = frozenset(ext[1:] for ext in _STORED_EXTENSIONS)
+
+# ファイルのハッシュ計算時の読み込み単位
+_HASH_CHUNK_SIZE = 1 << 20
+
+# 圧縮済みエントリをそのままコピーする際の読み込み単位
+_RAW_COPY_CHUNK_SIZE = 1 << 20
+
+# 1つのPPTX内で画像ハッシュを並列計算するスレッド数
+_HASH_WORKERS = 4
+
+# パイプラインスキャンで先読みしておくPPTXの数
+_PREFETCH_FILES = 4
 
 
 @dataclass
@@ -38,68 +78,485 @@ class ReplaceResult:
     message: str
 
 
+# 画像照合用のハッシュ方式（ディスクキャッシュのキーにも使う）
+_HASH_ALGO = 'xxh3_64' if xxhash is not None else 'md5'
+
+
+# MD5は未使用のハッシュオブジェクトを複製して使う（OpenSSL 3では生成のたびにアルゴリズムの
+# 検索が走るため）。暗号用途ではないので usedforsecurity=False を指定する（Python 3.9+）
+try:
+    _MD5_BASE = hashlib.md5(usedforsecurity=False)
+except TypeError:
+    _MD5_BASE = hashlib.md5()
+
+
+def _new_hasher():
+    """画像照合用のハッシュオブジェクトを生成（xxhashがあればXXH3、なければMD5）"""
+    if xxhash is not None:
+        return xxhash.xxh3_64()
+    return _MD5_BASE.copy()
+
+
 def calculate_file_hash(filepath: str) -> str:
-    """ファイルのMD5ハッシュを計算"""
-    hash_md5 = hashlib.md5()
+    """ファイルのハッシュを計算"""
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+ はバッファを再利用して読み込むfile_digestを使う
+            return hashlib.file_digest(f, _new_hasher).hexdigest()
+        # 読み込みバッファを使い回してチャンクごとのbytes生成を避ける
+        hasher = _new_hasher()
+        buf = bytearray(_HASH_CHUNK_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
 
 
 def calculate_bytes_hash(data: bytes) -> str:
-    """バイトデータのMD5ハッシュを計算"""
-    return hashlib.md5(data).hexdigest()
-
-
-def find_pptx_files(directory: str, recursive: bool = True) -> List[str]:
-    """指定ディレクトリ内のPPTXファイルを検索"""
-    pptx_files = []
-    if recursive:
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith('.pptx') and not file.startswith('~$'):
-                    pptx_files.append(os.path.join(root, file))
-    else:
-        for file in os.listdir(directory):
-            if file.lower().endswith('.pptx') and not file.startswith('~$'):
-                pptx_files.append(os.path.join(directory, file))
-    return sorted(pptx_files)
+    """バイトデータのハッシュを計算"""
+    if xxhash is not None:
+        return xxhash.xxh3_64_hexdigest(data)
+    hasher = _MD5_BASE.copy()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=16)
+def _load_image_cached(abspath: str, mtime_ns: int, size: int) -> Tuple[bytes, str]:
+    """画像ファイルの内容とハッシュ（更新日時・サイズもキーにして変更時は読み直す）"""
+    with open(abspath, 'rb') as f:
+        data = f.read()
+    return data, calculate_bytes_hash(data)
+
+
+def _load_image(filepath: str) -> Tuple[bytes, str]:
+    """画像ファイルの内容とハッシュを取得（一括処理中は同じファイルを一度だけ読む）"""
+    st = os.stat(filepath)
+    return _load_image_cached(os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+
+def _walk(directory: str, recursive: bool = True):
+    """
+    ディレクトリ内のPPTXファイルのパスを順に返す
+    
+    DirEntryはディレクトリ読み取り時の種別情報を持つため、エントリごとのstatが不要。
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif _PPTX_RE.search(name) and not name.startswith('~$'):
+                        yield entry.path
+        except OSError:
+            # os.walkと同様、読み取れないディレクトリは飛ばす
+            continue
+
+
+def find_pptx_files(directory: str, recursive: bool = True) -> Iterator[str]:
+    """
+    指定ディレクトリ内のPPTXファイルを検索
+    
+    走査全体を待たずに見つかった順に返す（並べ替えが必要な場合は呼び出し側で行う）。
+    """
+    yield from _walk(directory, recursive)
+
+
+def _iter_media_images(zf: zipfile.ZipFile):
+    """ppt/media/内の画像エントリのZipInfoを列挙"""
+    for info in zf.infolist():
+        name = info.filename
+        if name.startswith(_MEDIA_PREFIX) and name.rpartition('.')[2].lower() in _IMAGE_EXTS_NODOT:
+            yield info
+
+
+@dataclass
+class PptxManifest:
+    """PPTX内の画像エントリ一覧（スキャン時に作成し、置換時にも再利用する）"""
+    path: str
+    mtime_ns: int
+    file_size: int
+    # 内部パス -> (展開後サイズ, CRC32, ハッシュ。未計算ならNone)
+    entries: Dict[str, Tuple[int, int, Optional[str]]]
+    
+    def matched_names(self, target_hash: str) -> List[str]:
+        """ハッシュが一致する画像エントリの内部パス"""
+        return [name for name, (_, _, file_hash) in self.entries.items() if file_hash == target_hash]
+
+
+# 同じPPTXをスキャン・置換で繰り返し解析しないためのキャッシュ（キーは絶対パス）
+_manifest_cache: Dict[str, PptxManifest] = {}
+
+
+class _DigestCache:
+    """
+    画像エントリ一覧のディスクキャッシュ（sqlite）
+    
+    PPTXの絶対パス・更新日時・サイズとハッシュ方式が一致すれば、前回の実行で
+    計算した一覧を再利用する。キャッシュの読み書きに失敗しても処理は続行する。
+    キャッシュを開けない（ディレクトリに書き込めないなど）場合は以降使わない。
+    """
+    
+    def __init__(self, db_path: str, enabled: bool = True):
+        self.db_path = db_path
+        self.enabled = enabled
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        # プロセスプールのワーカーは親の接続を引き継がず、プロセスごとに接続する
+        if self._conn is None or self._pid != os.getpid():
+            try:
+                cache_dir = os.path.dirname(self.db_path)
+                os.makedirs(cache_dir, exist_ok=True)
+                if not os.access(cache_dir, os.W_OK):
+                    raise PermissionError(f"キャッシュディレクトリに書き込めません: {cache_dir}")
+                conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS digests ("
+                    "pptx_abspath TEXT PRIMARY KEY, hash_algo TEXT, "
+                    "mtime_ns INTEGER, size INTEGER, entries TEXT)"
+                )
+            except (sqlite3.Error, OSError):
+                self.enabled = False
+                raise
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+    
+    def get(self, key: str, mtime_ns: int, size: int) -> Optional[Dict[str, Tuple[int, int, Optional[str]]]]:
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT entries FROM digests "
+                    "WHERE pptx_abspath = ? AND hash_algo = ? AND mtime_ns = ? AND size = ?",
+                    (key, _HASH_ALGO, mtime_ns, size)
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            return None
+        if row is None:
+            return None
+        # 壊れた行や旧形式の行はキャッシュになかったものとして扱う
+        try:
+            entries = {name: tuple(value) for name, value in json.loads(row[0]).items()}
+        except (ValueError, TypeError, AttributeError):
+            return None
+        if not all(len(value) == 3 for value in entries.values()):
+            return None
+        return entries
+    
+    def put(self, key: str, manifest: PptxManifest) -> None:
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)",
+                        (key, _HASH_ALGO, manifest.mtime_ns, manifest.file_size,
+                         json.dumps(manifest.entries))
+                    )
+        except (sqlite3.Error, OSError):
+            pass
+
+
+# 環境変数 PPTX_REPLACER_NO_DISK_CACHE を設定するとディスクキャッシュを読み書きしない
+_digest_cache = _DigestCache(
+    os.path.join(os.path.expanduser("~"), ".cache", "pptx-replacer", "digests.sqlite3"),
+    enabled=not os.environ.get("PPTX_REPLACER_NO_DISK_CACHE")
+)
+
+
+def _hash_zip_entry(zf: zipfile.ZipFile, name: str) -> str:
+    """ZIPエントリを展開しながらハッシュを計算（エントリ全体をメモリに載せない）"""
+    hasher = _new_hasher()
+    with zf.open(name) as fp:
+        for chunk in iter(lambda: fp.read(_HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _pending_hashes(
+    entries: Dict[str, Tuple[int, int, Optional[str]]],
+    target_size: Optional[int],
+    target_crc: Optional[int] = None
+) -> List[str]:
+    """ハッシュ未計算で、計算が必要なエントリの内部パス"""
+    if target_size is None and target_crc is None:
+        return [name for name, (_, _, file_hash) in entries.items() if file_hash is None]
+    return [name for name, (size, crc, file_hash) in entries.items()
+            if file_hash is None
+            and (target_size is None or size == target_size)
+            and (target_crc is None or crc == target_crc)]
+
+
+class _MappedFile(mmap.mmap):
+    """ZipFileに渡せるメモリマップ（Python 3.12以前のmmapにはseekableがない）"""
+    
+    def seekable(self) -> bool:
+        return True
+
+
+def _map_file(path: str) -> mmap.mmap:
+    """ファイルを読み取り専用でメモリマップ（ページの読み込みはOSに任せ、bytesへのコピーを避ける）"""
+    with open(path, 'rb') as f:
+        return _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _cached_manifest(pptx_path: str, st: os.stat_result) -> Optional[PptxManifest]:
+    """更新日時・サイズが変わっていない場合に、キャッシュ済みの画像エントリ一覧を返す"""
+    key = os.path.abspath(pptx_path)
+    cached = _manifest_cache.get(key)
+    if cached is not None and (cached.mtime_ns != st.st_mtime_ns or cached.file_size != st.st_size):
+        cached = None
+    if cached is None:
+        # 前回の実行結果がディスクに残っていれば使う
+        disk_entries = _digest_cache.get(key, st.st_mtime_ns, st.st_size)
+        if disk_entries is not None:
+            cached = PptxManifest(pptx_path, st.st_mtime_ns, st.st_size, disk_entries)
+            _manifest_cache[key] = cached
+    return cached
 
 
-def scan_pptx_for_image(pptx_path: str, target_hash: str) -> List[MatchResult]:
-    """PPTXファイル内で対象画像をスキャン"""
+def _hash_entries_parallel(pptx_path: str, names: List[str]) -> List[str]:
+    """
+    複数のエントリのハッシュをスレッドで並列に計算（names と同じ順で返す）
+    
+    ZipFileのインスタンスはスレッド間で共有できない（ファイル位置や open() の管理情報を
+    共有する）ため、ワーカースレッドごとにPPTXをメモリマップして別々に開く。
+    同じファイルのマップはページキャッシュを共有するので、読み込みは重複しない。
+    """
+    local = threading.local()
+    opened: List[Tuple[zipfile.ZipFile, mmap.mmap]] = []
+    
+    def hash_entry(name: str) -> str:
+        worker_zf = getattr(local, 'zf', None)
+        if worker_zf is None:
+            worker_map = _map_file(pptx_path)
+            worker_zf = local.zf = zipfile.ZipFile(worker_map, 'r')
+            opened.append((worker_zf, worker_map))
+        return _hash_zip_entry(worker_zf, name)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(_HASH_WORKERS, len(names))) as executor:
+            return list(executor.map(hash_entry, names))
+    finally:
+        for worker_zf, worker_map in opened:
+            worker_zf.close()
+            worker_map.close()
+
+
+def _get_manifest(
+    pptx_path: str,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    mapped: Optional[mmap.mmap] = None,
+    stop_at_hash: Optional[str] = None
+) -> PptxManifest:
+    """
+    PPTXの画像エントリ一覧を取得
+    
+    target_size / target_crc を指定した場合は、中央ディレクトリ上のサイズ・CRC32が
+    一致するエントリだけを展開してハッシュを計算する（CRC32の衝突はハッシュで判別）。
+    PPTXの更新日時・サイズが変わっていなければ前回の結果を再利用する。
+    
+    Args:
+        mapped: メモリマップ済みのPPTX。指定した場合はファイルを開かずにこれを使う
+        stop_at_hash: 指定した場合はこのハッシュに一致するエントリが見つかった時点で
+                      残りのハッシュ計算を省く（未計算のエントリは必要になったときに計算）
+    """
+    st = os.stat(pptx_path)
+    key = os.path.abspath(pptx_path)
+    cached = _cached_manifest(pptx_path, st)
+    
+    if cached is not None:
+        pending = _pending_hashes(cached.entries, target_size, target_crc)
+        if not pending or (stop_at_hash is not None and cached.matched_names(stop_at_hash)):
+            return cached
+    
+    source = nullcontext(mapped) if mapped is not None else _map_file(pptx_path)
+    with source as fp, zipfile.ZipFile(fp, 'r') as zf:
+        if cached is not None:
+            entries = dict(cached.entries)
+        else:
+            # サイズとCRC32は中央ディレクトリから取得できるので展開不要
+            entries = {info.filename: (info.file_size, info.CRC, None)
+                       for info in _iter_media_images(zf)}
+            pending = _pending_hashes(entries, target_size, target_crc)
+        
+        # 展開とハッシュ計算が必要なエントリだけを、展開しながら逐次ハッシュする。
+        # 複数ある場合は、展開・ハッシュ計算がGILを解放するためスレッドで並列化する
+        if stop_at_hash is not None:
+            hashes = []
+            for name in pending:
+                hashes.append(_hash_zip_entry(zf, name))
+                if hashes[-1] == stop_at_hash:
+                    break
+        elif len(pending) > 1:
+            hashes = _hash_entries_parallel(pptx_path, pending)
+        else:
+            hashes = [_hash_zip_entry(zf, name) for name in pending]
+        for name, file_hash in zip(pending, hashes):
+            size, crc, _ = entries[name]
+            entries[name] = (size, crc, file_hash)
+    
+    manifest = PptxManifest(pptx_path, st.st_mtime_ns, st.st_size, entries)
+    _manifest_cache[key] = manifest
+    _digest_cache.put(key, manifest)
+    return manifest
+
+
+def scan_pptx_for_image(
+    pptx_path: str,
+    target_hash: str,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    collect_all: bool = True
+) -> List[MatchResult]:
+    """
+    PPTXファイル内で対象画像をスキャンし、一致した画像のみを返す
+    
+    全画像の一覧が必要な場合は enumerate_pptx_images を使う。
+    
+    Args:
+        target_size: 対象画像のバイトサイズ。指定するとサイズの異なる画像は
+                     展開・ハッシュ計算をせずに不一致とみなす
+        target_crc: 対象画像のCRC32。指定するとCRC32の異なる画像も同様に扱う
+        collect_all: Falseの場合は最初に一致した画像だけを返す（一致の有無だけ分かればよい場合）
+    """
     results = []
     
     try:
-        with zipfile.ZipFile(pptx_path, 'r') as zf:
-            for name in zf.namelist():
-                if name.startswith('ppt/media/'):
-                    ext = os.path.splitext(name)[1].lower()
-                    if ext in IMAGE_EXTENSIONS:
-                        data = zf.read(name)
-                        file_hash = calculate_bytes_hash(data)
-                        matched = (file_hash == target_hash)
-                        results.append(MatchResult(
-                            pptx_path=pptx_path,
-                            internal_image_path=name,
-                            internal_image_name=os.path.basename(name),
-                            matched=matched
-                        ))
-    except Exception as e:
+        manifest = _get_manifest(pptx_path, target_size, target_crc,
+                                 stop_at_hash=None if collect_all else target_hash)
+        matched_names = manifest.matched_names(target_hash)
+        if not collect_all:
+            matched_names = matched_names[:1]
+        for name in matched_names:
+            results.append(MatchResult(
+                pptx_path=pptx_path,
+                internal_image_path=name,
+                internal_image_name=os.path.basename(name),
+                matched=True
+            ))
+    except Exception:
         pass
     
     return results
 
 
+def enumerate_pptx_images(pptx_path: str) -> List[Tuple[str, int, Optional[str]]]:
+    """PPTX内の全画像を (内部パス, サイズ, ハッシュ) のタプルで列挙"""
+    entries = _get_manifest(pptx_path).entries
+    return [(name, size, file_hash) for name, (size, _, file_hash) in entries.items()]
+
+
+def _copy_zip_entry_raw(
+    zf_in: zipfile.ZipFile,
+    zf_out: zipfile.ZipFile,
+    info: zipfile.ZipInfo
+) -> None:
+    """エントリを展開・再圧縮せず、圧縮済みのバイト列のまま出力ZIPへコピー"""
+    # ローカルファイルヘッダーを読み飛ばして圧縮データの先頭へ移動
+    fp = zf_in.fp
+    fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+    
+    out_info = zipfile.ZipInfo(info.filename, info.date_time)
+    out_info.compress_type = info.compress_type
+    # データディスクリプタは使わず、サイズとCRCをローカルヘッダーに書く
+    out_info.flag_bits = info.flag_bits & ~0x08
+    out_info.CRC = info.CRC
+    out_info.compress_size = info.compress_size
+    out_info.file_size = info.file_size
+    out_info.create_system = info.create_system
+    out_info.external_attr = info.external_attr
+    
+    zf_out.fp.seek(zf_out.start_dir)
+    out_info.header_offset = zf_out.fp.tell()
+    zf_out.fp.write(out_info.FileHeader())
+    # 大きなエントリでも全体をメモリに載せないよう、圧縮データを分割してコピー
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = fp.read(min(remaining, _RAW_COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"圧縮データが途中で終わっています: {info.filename}")
+        zf_out.fp.write(chunk)
+        remaining -= len(chunk)
+    zf_out.filelist.append(out_info)
+    zf_out.NameToInfo[out_info.filename] = out_info
+    zf_out.start_dir = zf_out.fp.tell()
+    zf_out._didModify = True
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    バックアップ用にファイルを複製（可能ならハードリンクでデータをコピーしない）
+    
+    置換結果は別ファイルに書いてから os.replace で差し替えるため、元のファイルの
+    中身が書き換わることはなく、ハードリンクでもバックアップは元の内容のまま残る。
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        # 別ドライブ・ハードリンク非対応のファイルシステムなど
+        shutil.copy2(src, dst)
+
+
+def _write_entry(zf_out: zipfile.ZipFile, src_info: zipfile.ZipInfo, data: bytes) -> None:
+    """
+    エントリを書き込み（圧縮済み画像は無圧縮、それ以外は速度優先のレベル1で圧縮）
+    
+    元エントリの更新日時と属性は引き継ぐ。
+    """
+    name = src_info.filename
+    zi = zipfile.ZipInfo(name, date_time=src_info.date_time)
+    zi.external_attr = src_info.external_attr
+    if name.startswith(_MEDIA_PREFIX) and name.rpartition('.')[2].lower() in _STORED_EXTS_NODOT:
+        zi.compress_type = zipfile.ZIP_STORED
+        zf_out.writestr(zi, data)
+    else:
+        zi.compress_type = zipfile.ZIP_DEFLATED
+        zf_out.writestr(zi, data, compresslevel=1)
+
+
 def replace_image_in_pptx(
     pptx_path: str,
     target_hash: str,
     replacement_image_path: str,
     output_path: Optional[str] = None,
-    backup: bool = True
+    backup: bool = True,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    matching_names: Optional[Set[str]] = None
 ) -> ReplaceResult:
-    """PPTXファイル内の画像を置換"""
+    """
+    PPTXファイル内の画像を置換
+    
+    置換対象はスキャン時に作成した画像エントリ一覧から決めるため、
+    スキャン後に変更されていなければ画像の展開・ハッシュ計算は行わない。
+    
+    Args:
+        target_size, target_crc: 対象画像のサイズとCRC32（scan_pptx_for_image と同じ値を渡す）
+        matching_names: スキャンで一致した内部パス。スキャン後にPPTXが変更されていなければ
+                        （更新日時・サイズがキャッシュと一致し、これらが対象のハッシュを持てば）
+                        ハッシュを照合せずこれらのエントリをそのまま置き換える
+    """
     
     if not os.path.exists(pptx_path):
         return ReplaceResult(pptx_path, False, 0, "ファイルが見つかりません")
@@ -107,47 +564,199 @@ def replace_image_in_pptx(
     if not os.path.exists(replacement_image_path):
         return ReplaceResult(pptx_path, False, 0, "置換用画像が見つかりません")
     
-    # 置換用画像を読み込み
-    with open(replacement_image_path, 'rb') as f:
-        replacement_data = f.read()
+    # 置換用画像を読み込み（一括置換では2ファイル目以降キャッシュを再利用）
+    replacement_data, _ = _load_image(replacement_image_path)
     
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_pptx = os.path.join(temp_dir, 'temp.pptx')
-        replaced_count = 0
+    replaced_count = 0
+    
+    try:
+        matched_names = None
+        if matching_names is not None:
+            # スキャン後に編集・再保存されていれば、同じ内部パスが別の画像を指している
+            # 可能性があるため、現在のPPTXのキャッシュで確かめてから使う
+            cached = _cached_manifest(pptx_path, os.stat(pptx_path))
+            if cached is not None and set(matching_names) <= set(cached.matched_names(target_hash)):
+                matched_names = set(matching_names)
+        if matched_names is None:
+            manifest = _get_manifest(pptx_path, target_size, target_crc)
+            matched_names = set(manifest.matched_names(target_hash))
+        if not matched_names:
+            return ReplaceResult(pptx_path, True, 0, "マッチする画像なし")
+        
+        final_path = output_path if output_path else pptx_path
+        out_dir = os.path.dirname(os.path.abspath(final_path))
+        os.makedirs(out_dir, exist_ok=True)
         
+        # 出力先と同じディレクトリに一時ファイルを作り、完成後に名前を置き換える
+        temp = tempfile.NamedTemporaryFile(dir=out_dir, suffix='.pptx.tmp', delete=False)
         try:
-            with zipfile.ZipFile(pptx_path, 'r') as zf_in:
-                with zipfile.ZipFile(temp_pptx, 'w', zipfile.ZIP_DEFLATED) as zf_out:
-                    for item in zf_in.namelist():
-                        data = zf_in.read(item)
-                        
-                        if item.startswith('ppt/media/'):
-                            ext = os.path.splitext(item)[1].lower()
-                            if ext in IMAGE_EXTENSIONS:
-                                file_hash = calculate_bytes_hash(data)
-                                if file_hash == target_hash:
-                                    data = replacement_data
-                                    replaced_count += 1
-                        
-                        zf_out.writestr(item, data)
+            with temp, zipfile.ZipFile(pptx_path, 'r') as zf_in:
+                with zipfile.ZipFile(temp, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf_out:
+                    for info in zf_in.infolist():
+                        if info.filename in matched_names:
+                            _write_entry(zf_out, info, replacement_data)
+                            replaced_count += 1
+                        else:
+                            # 変更しないエントリは圧縮済みデータをそのままコピー
+                            _copy_zip_entry_raw(zf_in, zf_out, info)
+            
+            if backup and output_path is None:
+                backup_path = pptx_path + '.backup'
+                if not os.path.exists(backup_path):
+                    _link_or_copy(pptx_path, backup_path)
+            
+            # 一時ファイルは0600で作られるため元ファイルの権限に揃える
+            shutil.copymode(pptx_path, temp.name)
+            os.replace(temp.name, final_path)
+        except BaseException:
+            if os.path.exists(temp.name):
+                os.remove(temp.name)
+            raise
+        
+        return ReplaceResult(pptx_path, True, replaced_count, f"{replaced_count}個の画像を置換")
             
-            if replaced_count > 0:
-                if backup and output_path is None:
-                    backup_path = pptx_path + '.backup'
-                    if not os.path.exists(backup_path):
-                        shutil.copy2(pptx_path, backup_path)
-                
-                final_path = output_path if output_path else pptx_path
-                if output_path:
-                    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                shutil.copy2(temp_pptx, final_path)
-                
-                return ReplaceResult(pptx_path, True, replaced_count, f"{replaced_count}個の画像を置換")
+    except Exception as e:
+        return ReplaceResult(pptx_path, False, 0, f"エラー: {str(e)}")
+
+
+def scan_many_pipelined(
+    pptx_files: Iterable[str],
+    target_hash: str,
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None,
+    n_workers: int = _HASH_WORKERS,
+    collect_all: bool = True
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    複数のPPTXをパイプラインでスキャンし、(パス, 一致した内部パス) を完了順に返す
+    
+    読み込みスレッドがPPTXを先読みしてキューに積み、ワーカースレッドが展開・
+    ハッシュ計算を行うことで、ディスクの読み込み待ちとCPU処理を重ねる。
+    展開（zlib）とハッシュ計算はGILを解放するため、PPTXの内容をプロセス間で
+    受け渡さずに済むスレッドで並列化する。キャッシュで判定できるPPTXは読み込まない。
+    collect_all=False の場合、一致した内部パスはPPTXごとに最初の1つだけを返す。
+    呼び出し側が途中で反復をやめた場合は、残りのPPTXを読み込まずにスレッドを終了させる。
+    """
+    # 先読みするPPTXの数を制限する
+    in_queue: queue.Queue = queue.Queue(maxsize=_PREFETCH_FILES)
+    out_queue: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    
+    def reader():
+        try:
+            for pptx_path in pptx_files:
+                if stop.is_set():
+                    break
+                mapped = None
+                try:
+                    cached = _cached_manifest(pptx_path, os.stat(pptx_path))
+                    if cached is None or _pending_hashes(cached.entries, target_size, target_crc):
+                        # bytesに読み込まずメモリマップし、OSにバックグラウンドで先読みさせる
+                        mapped = _map_file(pptx_path)
+                        if hasattr(mmap, 'MADV_WILLNEED'):
+                            mapped.madvise(mmap.MADV_WILLNEED)
+                except (OSError, ValueError):
+                    pass
+                in_queue.put((pptx_path, mapped))
+        finally:
+            for _ in range(n_workers):
+                in_queue.put(None)
+    
+    def worker():
+        while True:
+            item = in_queue.get()
+            if item is None:
+                out_queue.put(None)
+                return
+            pptx_path, mapped = item
+            if stop.is_set():
+                # 中断後はキューに残ったPPTXを処理せず、マップを閉じて読み捨てる
+                if mapped is not None:
+                    mapped.close()
+                continue
+            try:
+                manifest = _get_manifest(pptx_path, target_size, target_crc, mapped,
+                                         stop_at_hash=None if collect_all else target_hash)
+                matched_names = manifest.matched_names(target_hash)
+                if not collect_all:
+                    matched_names = matched_names[:1]
+            except Exception:
+                matched_names = []
+            finally:
+                if mapped is not None:
+                    mapped.close()
+            out_queue.put((pptx_path, matched_names))
+    
+    threads = [threading.Thread(target=reader, daemon=True)]
+    threads += [threading.Thread(target=worker, daemon=True) for _ in range(n_workers)]
+    for thread in threads:
+        thread.start()
+    
+    try:
+        finished = 0
+        while finished < n_workers:
+            item = out_queue.get()
+            if item is None:
+                finished += 1
             else:
-                return ReplaceResult(pptx_path, True, 0, "マッチする画像なし")
-                
-        except Exception as e:
-            return ReplaceResult(pptx_path, False, 0, f"エラー: {str(e)}")
+                yield item
+    finally:
+        # 途中で反復をやめた場合（GeneratorExit）も、読み込みスレッドとワーカーが
+        # キューを空にして終了できるよう停止を知らせる
+        stop.set()
+        while True:
+            try:
+                item = out_queue.get_nowait()
+            except queue.Empty:
+                break
+
+
+def _replace_in_worker(
+    pptx_path: str,
+    target_hash: str,
+    replacement_image_path: str,
+    output_path: Optional[str],
+    backup: bool,
+    matching_names: Optional[List[str]],
+    target_size: Optional[int] = None,
+    target_crc: Optional[int] = None
+) -> ReplaceResult:
+    """
+    ワーカーで置換を実行（スキャンで一致したエントリだけを置き換える）
+    
+    matching_names が None の場合（一致の有無だけを調べた高速スキャンの後など）や、
+    スキャン後にPPTXが変更されていた場合は、target_size / target_crc で絞り込みながら
+    一致するエントリを探し直す。
+    """
+    return replace_image_in_pptx(
+        pptx_path, target_hash, replacement_image_path, output_path, backup,
+        target_size, target_crc,
+        matching_names=set(matching_names) if matching_names is not None else None
+    )
+
+
+def _batch_scan_matches(
+    folder_path: str,
+    source_data: bytes,
+    source_hash: str,
+    recursive: bool = True
+) -> Dict[str, List[str]]:
+    """
+    フォルダ内のPPTXファイルを一括スキャンし、一致した画像の内部パスを返す
+    
+    PPTXの読み込みと展開・ハッシュ計算を重ねて並列にスキャンする（scan_many_pipelined）。
+    """
+    source_size = len(source_data)
+    source_crc = zlib.crc32(source_data)
+    pptx_files = find_pptx_files(folder_path, recursive)
+    
+    results = {}
+    for pptx_path, matched_names in scan_many_pipelined(
+            pptx_files, source_hash, source_size, source_crc):
+        results[pptx_path] = matched_names
+    
+    # 完了順ではなくパス順に並べる
+    return dict(sorted(results.items()))
 
 
 def batch_scan(
@@ -161,16 +770,9 @@ def batch_scan(
     Returns:
         Dict[pptx_path, match_count]
     """
-    source_hash = calculate_file_hash(source_image_path)
-    pptx_files = find_pptx_files(folder_path, recursive)
-    
-    results = {}
-    for pptx_path in pptx_files:
-        matches = scan_pptx_for_image(pptx_path, source_hash)
-        match_count = sum(1 for m in matches if m.matched)
-        results[pptx_path] = match_count
-    
-    return results
+    source_data, source_hash = _load_image(source_image_path)
+    matches = _batch_scan_matches(folder_path, source_data, source_hash, recursive)
+    return {pptx_path: len(names) for pptx_path, names in matches.items()}
 
 
 def batch_replace(
@@ -185,34 +787,57 @@ def batch_replace(
     """
     フォルダ内のPPTXファイルを一括置換
     
+    置換はファイルごとに複数プロセスで並列に行うため、Windowsなどspawn方式の環境では
+    呼び出し元を if __name__ == "__main__" で保護すること。
+    
     Args:
         progress_callback: 進捗コールバック関数 (current, total, pptx_path)
     """
-    source_hash = calculate_file_hash(source_image_path)
+    # 入れ替え元画像はここで一度だけ読み込み、スキャンにもそのまま渡す
+    source_data, source_hash = _load_image(source_image_path)
+    source_size, source_crc = len(source_data), zlib.crc32(source_data)
     
-    # まずスキャン
-    scan_results = batch_scan(folder_path, source_image_path, recursive)
+    # まずスキャン（一致した内部パスを置換時にそのまま使い、再照合しない）
+    scan_results = _batch_scan_matches(folder_path, source_data, source_hash, recursive)
     
     # マッチしたファイルのみ置換
-    target_files = [(p, c) for p, c in scan_results.items() if c > 0]
+    target_files = [(p, names) for p, names in scan_results.items() if names]
     total = len(target_files)
     
     results = []
-    for i, (pptx_path, _) in enumerate(target_files):
+    if not target_files:
+        return results
+    
+    tasks = []
+    for pptx_path, matched_names in target_files:
         # 出力パスの決定
         if output_folder:
             rel_path = os.path.relpath(pptx_path, folder_path)
             output_path = os.path.join(output_folder, rel_path)
         else:
             output_path = None
-        
-        result = replace_image_in_pptx(
-            pptx_path, source_hash, target_image_path, output_path, backup
-        )
+        tasks.append((pptx_path, source_hash, target_image_path,
+                      output_path, backup, matched_names, source_size, source_crc))
+    
+    if total == 1:
+        # 1ファイルだけならプロセスを起動せずにこのプロセスで置換する
+        result = _replace_in_worker(*tasks[0])
         results.append(result)
-        
         if progress_callback:
-            progress_callback(i + 1, total, pptx_path)
+            progress_callback(1, total, result.pptx_path)
+        return results
+    
+    # ファイルごとに複数プロセスで並列に置換
+    max_workers = max(1, min(os.cpu_count() or 1, total))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_replace_in_worker, *task) for task in tasks]
+        
+        for i, future in enumerate(futures):
+            result = future.result()
+            results.append(result)
+            
+            if progress_callback:
+                progress_callback(i + 1, total, result.pptx_path)
     
     return results
 
@@ -7,29 +7,186 @@ PowerPoint 画像一括置換スクリプト
 """
 
 import os
+import re
 import sys
 import shutil
 import hashlib
 import argparse
+import struct
 import zipfile
 import tempfile
+import zlib
+import mmap
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Iterator, Callable
 import json
 
+# 画像の同一性判定は暗号強度不要のため、xxhashがあればXXH3も選べる（既定は従来どおりMD5）
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# 一覧表示の対象とする画像拡張子
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.wmf', '.emf'})
+
+# ZIP内の画像エントリの判定用（拡張子はドットなし・小文字で、splitextを使わずに照合する）
+_MEDIA_PREFIX = 'ppt/media/'
+_IMAGE_EXTS_NODOT = frozenset(ext[1:] for ext in IMAGE_EXTENSIONS)
+
+# ファイルのハッシュ計算時の読み込み単位
+_HASH_CHUNK_SIZE = 1 << 20
+
+# 圧縮済みエントリをそのままコピーする際の読み込み単位
+_RAW_COPY_CHUNK_SIZE = 1 << 20
+
+# PPTXファイル名（大文字小文字を区別しない）
+_PPTX_RE = re.compile(r'\.pptx$', re.IGNORECASE)
+
+# 既に圧縮済みで再圧縮しても縮まない画像形式（ZIP内では無圧縮で格納する）
+_STORED_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif'})
+_STORED_EXTS_NODOT = frozenset(ext[1:] for ext in _STORED_EXTENSIONS)
+
+# PPTXを探す際に降りないディレクトリ（バージョン管理・依存パッケージ・キャッシュ）
+_SKIP_DIRS = frozenset({'.git', '.svn', '.hg', 'node_modules', '__pycache__'})
+
+# scan_directory_images が前回の結果を保存するインデックス
+_INDEX_FILENAME = '.pptx_image_index.json'
+_INDEX_VERSION = 1
+
+# これより大きいPPTXはメモリマップで開く（小さいファイルではマップの作成コストの方が大きい）
+_MMAP_THRESHOLD = 32 << 20
+
+# 置換したエントリを圧縮する際の既定レベル（画像の差し替えが目的のため速度を優先）
+_DEFAULT_COMPRESS_LEVEL = 1
+
+# 選択できるハッシュ方式（md5は従来の識別子との互換用）
+HASH_ALGORITHMS = ('md5', 'xxh3_128')
+_hash_algo = 'md5'
+
+
+def set_hash_algorithm(name: str) -> None:
+    """画像の識別に使うハッシュ方式を設定"""
+    global _hash_algo
+    if name not in HASH_ALGORITHMS:
+        raise ValueError(f"未対応のハッシュ方式です: {name}")
+    if name == 'xxh3_128' and xxhash is None:
+        raise ValueError("xxh3_128 を使うには xxhash をインストールしてください（pip install xxhash）")
+    _hash_algo = name
+
+
+# 一括置換でワーカーに事前に渡した置換用画像（絶対パス -> 内容）
+_preloaded_images: Dict[str, bytes] = {}
+
+
+def _init_worker(hash_algo: str, preload: Dict[str, bytes]) -> None:
+    """ワーカープロセスの初期化（ハッシュ方式の設定と置換用画像の受け取り）"""
+    set_hash_algorithm(hash_algo)
+    _preloaded_images.update(preload)
+
+
+def _process_pool(n_tasks: int, preload: Optional[Dict[str, bytes]] = None) -> ProcessPoolExecutor:
+    """
+    PPTXごとの処理を並列実行するプロセスプールを作成
+    
+    spawn方式の環境でもワーカーが同じハッシュ方式を使うよう、設定を引き継ぐ。
+    preload の画像はワーカーごとに一度だけ渡し、タスクごとには送らない。
+    """
+    max_workers = max(1, min(os.cpu_count() or 1, n_tasks))
+    return ProcessPoolExecutor(max_workers=max_workers,
+                               initializer=_init_worker, initargs=(_hash_algo, preload or {}))
+
+
+# MD5は未使用のハッシュオブジェクトを複製して使う（OpenSSL 3では生成のたびにアルゴリズムの
+# 検索が走るため）。暗号用途ではないので usedforsecurity=False を指定する（Python 3.9+）
+try:
+    _MD5_BASE = hashlib.md5(usedforsecurity=False)
+except TypeError:
+    _MD5_BASE = hashlib.md5()
+
+
+def _new_hasher():
+    """設定中の方式のハッシュオブジェクトを作成"""
+    if _hash_algo == 'xxh3_128':
+        return xxhash.xxh3_128()
+    return _MD5_BASE.copy()
+
+
+def _hash_label() -> str:
+    """表示用のハッシュ方式名"""
+    return _hash_algo.upper()
+
 
 def calculate_file_hash(filepath: str) -> str:
-    """ファイルのMD5ハッシュを計算"""
-    hash_md5 = hashlib.md5()
+    """ファイルのハッシュを計算（方式は set_hash_algorithm で設定、既定はMD5）"""
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+        if hasattr(hashlib, 'file_digest'):
+            # Python 3.11+ はバッファを再利用して読み込むfile_digestを使う
+            return hashlib.file_digest(f, _new_hasher).hexdigest()
+        # 読み込みバッファを使い回してチャンクごとのbytes生成を避ける
+        hasher = _new_hasher()
+        buf = bytearray(_HASH_CHUNK_SIZE)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
 
 
 def calculate_bytes_hash(data: bytes) -> str:
-    """バイトデータのMD5ハッシュを計算"""
-    return hashlib.md5(data).hexdigest()
+    """バイトデータのハッシュを計算"""
+    if _hash_algo == 'xxh3_128':
+        return xxhash.xxh3_128_hexdigest(data)
+    hasher = _MD5_BASE.copy()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _hash_zip_entry(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+    """ZIPエントリを展開しながらハッシュを計算（エントリ全体をメモリに載せない）"""
+    hasher = _new_hasher()
+    with zf.open(info) as fp:
+        for chunk in iter(lambda: fp.read(_HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# (ハッシュ方式, サイズ, CRC32) -> ハッシュ。多くのPPTXに同じロゴなどが埋め込まれている場合、
+# 同じ内容のエントリは（プロセスごとに）一度だけ展開・ハッシュ計算する
+_entry_hash_memo: Dict[Tuple[str, int, int], str] = {}
+
+
+def _hash_zip_entry_memo(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+    """中央ディレクトリのサイズとCRC32が同じエントリは、計算済みのハッシュを再利用"""
+    key = (_hash_algo, info.file_size, info.CRC)
+    digest = _entry_hash_memo.get(key)
+    if digest is None:
+        digest = _entry_hash_memo[key] = _hash_zip_entry(zf, info)
+    return digest
+
+
+@lru_cache(maxsize=16)
+def _read_file_cached(abspath: str, mtime_ns: int, size: int) -> bytes:
+    """ファイル内容を読み込み（更新日時・サイズもキーにして変更時は読み直す）"""
+    with open(abspath, 'rb') as f:
+        return f.read()
+
+
+def read_image_bytes(filepath: str) -> bytes:
+    """画像ファイルを読み込み（一括置換中は同じファイルを一度だけ読む）"""
+    abspath = os.path.abspath(filepath)
+    data = _preloaded_images.get(abspath)
+    if data is not None:
+        return data
+    st = os.stat(abspath)
+    return _read_file_cached(abspath, st.st_mtime_ns, st.st_size)
 
 
 def get_image_info(filepath: str) -> Dict:
@@ -38,49 +195,225 @@ def get_image_info(filepath: str) -> Dict:
         "filename": os.path.basename(filepath),
         "size": os.path.getsize(filepath),
         "hash": calculate_file_hash(filepath),
+        "crc32": f"{zlib.crc32(read_image_bytes(filepath)):08x}",
     }
 
 
-def find_pptx_files(directory: str, recursive: bool = True) -> List[str]:
-    """指定ディレクトリ内のPPTXファイルを検索"""
-    pptx_files = []
-    if recursive:
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.lower().endswith('.pptx') and not file.startswith('~$'):
-                    pptx_files.append(os.path.join(root, file))
-    else:
-        for file in os.listdir(directory):
-            if file.lower().endswith('.pptx') and not file.startswith('~$'):
-                pptx_files.append(os.path.join(directory, file))
-    return pptx_files
+def _walk(directory: str, recursive: bool, skip_dirs: frozenset):
+    """
+    ディレクトリ内のPPTXファイルのパスを順に返す
+    
+    DirEntryはディレクトリ読み取り時の種別情報を持つため、エントリごとのstatが不要。
+    skip_dirs に含まれる名前のディレクトリには降りない。
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif _PPTX_RE.search(name) and not name.startswith('~$'):
+                        yield entry.path
+        except OSError:
+            # os.walkと同様、読み取れないディレクトリは飛ばす
+            continue
+
+
+def find_pptx_files(
+    directory: str,
+    recursive: bool = True,
+    skip_dirs: frozenset = _SKIP_DIRS
+) -> Iterator[str]:
+    """
+    指定ディレクトリ内のPPTXファイルを検索（skip_dirs の名前のディレクトリは検索しない）
+    
+    見つかった順に返すため、呼び出し側は検索の完了を待たずに処理を始められる。
+    """
+    yield from _walk(directory, recursive, skip_dirs)
+
+
+class _MappedFile(mmap.mmap):
+    """ZipFileに渡せるメモリマップ（Python 3.12以前のmmapにはseekableがない）"""
+    
+    def seekable(self) -> bool:
+        return True
+
+
+@contextmanager
+def _open_pptx(pptx_path: str):
+    """
+    PPTXを読み取り用のZipFileとして開く
+    
+    _MMAP_THRESHOLD を超える大きなファイルはメモリマップ経由で読み、
+    ページキャッシュからユーザー空間のバッファへのコピーを避ける。
+    """
+    if os.path.getsize(pptx_path) <= _MMAP_THRESHOLD:
+        with zipfile.ZipFile(pptx_path, 'r') as zf:
+            yield zf
+        return
+    with open(pptx_path, 'rb') as f:
+        mm = _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm, zipfile.ZipFile(mm, 'r') as zf:
+        yield zf
 
 
 def list_images_in_pptx(pptx_path: str) -> List[Dict]:
     """PPTXファイル内の画像一覧を取得"""
     images = []
-    with zipfile.ZipFile(pptx_path, 'r') as zf:
-        for name in zf.namelist():
-            if name.startswith('ppt/media/'):
-                ext = os.path.splitext(name)[1].lower()
-                if ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.wmf', '.emf']:
-                    data = zf.read(name)
+    with _open_pptx(pptx_path) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            if name.startswith(_MEDIA_PREFIX):
+                if name.rpartition('.')[2].lower() in _IMAGE_EXTS_NODOT:
+                    # サイズは中央ディレクトリから取得し、ハッシュはエントリ全体を読み込まずに
+                    # _HASH_CHUNK_SIZE 単位で展開しながら計算する（他のPPTXで同じサイズ・CRC32の
+                    # エントリを計算済みならそれを使う）
                     images.append({
                         "path": name,
                         "filename": os.path.basename(name),
-                        "size": len(data),
-                        "hash": calculate_bytes_hash(data),
+                        "size": info.file_size,
+                        "hash": _hash_zip_entry_memo(zf, info),
                     })
     return images
 
 
+def _copy_zip_entry_raw(
+    zf_in: zipfile.ZipFile,
+    zf_out: zipfile.ZipFile,
+    info: zipfile.ZipInfo
+) -> None:
+    """エントリを展開・再圧縮せず、圧縮済みのバイト列のまま出力ZIPへコピー"""
+    # ローカルファイルヘッダーを読み飛ばして圧縮データの先頭へ移動
+    fp = zf_in.fp
+    fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, fp.read(zipfile.sizeFileHeader))
+    fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+    
+    out_info = zipfile.ZipInfo(info.filename, info.date_time)
+    out_info.compress_type = info.compress_type
+    # データディスクリプタは使わず、サイズとCRCをローカルヘッダーに書く
+    out_info.flag_bits = info.flag_bits & ~0x08
+    out_info.CRC = info.CRC
+    out_info.compress_size = info.compress_size
+    out_info.file_size = info.file_size
+    out_info.create_system = info.create_system
+    out_info.external_attr = info.external_attr
+    
+    zf_out.fp.seek(zf_out.start_dir)
+    out_info.header_offset = zf_out.fp.tell()
+    zf_out.fp.write(out_info.FileHeader())
+    # 大きなエントリでも全体をメモリに載せないよう、圧縮データを分割してコピー
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = fp.read(min(remaining, _RAW_COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"圧縮データが途中で終わっています: {info.filename}")
+        zf_out.fp.write(chunk)
+        remaining -= len(chunk)
+    zf_out.filelist.append(out_info)
+    zf_out.NameToInfo[out_info.filename] = out_info
+    zf_out.start_dir = zf_out.fp.tell()
+    zf_out._didModify = True
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """
+    バックアップ用にファイルを複製（可能ならハードリンクでデータをコピーしない）
+    
+    置換結果は別ファイルに書いてから os.replace で差し替えるため、元のファイルの
+    中身が書き換わることはなく、ハードリンクでもバックアップは元の内容のまま残る。
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        # 別ドライブ・ハードリンク非対応のファイルシステムなど
+        shutil.copy2(src, dst)
+
+
+def _write_entry(
+    zf_out: zipfile.ZipFile,
+    src_info: zipfile.ZipInfo,
+    data: bytes,
+    compress_level: int = _DEFAULT_COMPRESS_LEVEL
+) -> None:
+    """
+    エントリを書き込み（圧縮済み画像は無圧縮、それ以外は compress_level で圧縮）
+    
+    元エントリの更新日時と属性は引き継ぐ。
+    """
+    name = src_info.filename
+    zi = zipfile.ZipInfo(name, date_time=src_info.date_time)
+    zi.external_attr = src_info.external_attr
+    if name.startswith(_MEDIA_PREFIX) and name.rpartition('.')[2].lower() in _STORED_EXTS_NODOT:
+        zi.compress_type = zipfile.ZIP_STORED
+        zf_out.writestr(zi, data)
+    else:
+        zi.compress_type = zipfile.ZIP_DEFLATED
+        zf_out.writestr(zi, data, compresslevel=compress_level)
+
+
+def _make_matcher(
+    match_by: str,
+    target_identifier: Optional[str],
+    replacement_image_path: Optional[str],
+    target_size: Optional[int],
+    replacements: Dict[str, str]
+) -> Optional[Callable[[zipfile.ZipFile, zipfile.ZipInfo], Optional[str]]]:
+    """
+    マッチング方法ごとに特化した照合関数を作成（未対応の方法なら None）
+    
+    照合関数はメディアエントリを受け取り、置換するなら置換用画像のパス、しないなら None を返す。
+    ファイル名・サイズ・CRC32は中央ディレクトリで判定し、ハッシュはエントリ全体を
+    読み込まずに展開しながら計算する。
+    """
+    if match_by == "hash":
+        def match(zf_in, info):
+            # サイズが分かっていれば、サイズの異なる画像は展開・ハッシュ計算をしない
+            if target_size is not None and info.file_size != target_size:
+                return None
+            # 他のPPTXで同じサイズ・CRC32のエントリが対象外と分かっていれば展開しない。
+            # 対象と一致した場合は取り違えを避けるため、このエントリ自体のハッシュで確かめる
+            known = _entry_hash_memo.get((_hash_algo, info.file_size, info.CRC))
+            if known is not None and known not in replacements:
+                return None
+            if known is None:
+                return replacements.get(_hash_zip_entry_memo(zf_in, info))
+            return replacements.get(_hash_zip_entry(zf_in, info))
+    elif match_by == "filename":
+        basename = os.path.basename
+        def match(zf_in, info):
+            return replacement_image_path if basename(info.filename) == target_identifier else None
+    elif match_by == "size":
+        size = int(target_identifier)
+        def match(zf_in, info):
+            return replacement_image_path if info.file_size == size else None
+    elif match_by == "crc32":
+        crc = int(target_identifier, 16)
+        def match(zf_in, info):
+            # CRC32は衝突し得るため、サイズが分かっていればサイズも一致を確認する
+            if info.CRC == crc and (target_size is None or info.file_size == target_size):
+                return replacement_image_path
+            return None
+    else:
+        return None
+    return match
+
+
 def replace_image_in_pptx(
     pptx_path: str,
-    target_identifier: str,
-    replacement_image_path: str,
+    target_identifier: Optional[str],
+    replacement_image_path: Optional[str],
     match_by: str = "hash",
     output_path: Optional[str] = None,
-    backup: bool = True
+    backup: bool = True,
+    compress_level: int = _DEFAULT_COMPRESS_LEVEL,
+    target_size: Optional[int] = None,
+    replacements: Optional[Dict[str, str]] = None,
+    max_replacements: Optional[int] = None
 ) -> Tuple[bool, int, str]:
     """
     PPTXファイル内の画像を置換
@@ -89,9 +422,17 @@ def replace_image_in_pptx(
         pptx_path: 対象のPPTXファイルパス
         target_identifier: 置換対象の識別子（ハッシュ、ファイル名、またはサイズ）
         replacement_image_path: 置換用画像のパス
-        match_by: マッチング方法 ("hash", "filename", "size")
+        match_by: マッチング方法 ("hash", "filename", "size", "crc32")。
+                  "crc32" はZIPの中央ディレクトリに記録されたCRC32（16進数）と比較し、展開しない
         output_path: 出力先パス（Noneの場合は上書き）
         backup: バックアップを作成するか
+        compress_level: 置換した画像を圧縮する場合のDEFLATEレベル（0-9）
+        target_size: match_by="hash" / "crc32" のとき、置換対象の画像のバイトサイズ（任意）。
+                     指定するとサイズの異なる画像はハッシュを計算せずに不一致とみなす
+        replacements: ハッシュ -> 置換用画像のパス。指定した場合は target_identifier と
+                      replacement_image_path の代わりに使い、複数の画像を1回の書き換えで置換する
+        max_replacements: 1ファイルあたりの最大置換数（任意）。達した後のエントリは
+                          マッチングせずにそのままコピーする
     
     Returns:
         (成功フラグ, 置換数, メッセージ)
@@ -99,66 +440,93 @@ def replace_image_in_pptx(
     if not os.path.exists(pptx_path):
         return False, 0, f"ファイルが見つかりません: {pptx_path}"
     
-    if not os.path.exists(replacement_image_path):
-        return False, 0, f"置換用画像が見つかりません: {replacement_image_path}"
+    if replacements is None:
+        if not os.path.exists(replacement_image_path):
+            return False, 0, f"置換用画像が見つかりません: {replacement_image_path}"
+        replacements = {target_identifier: replacement_image_path}
+    else:
+        # target_size は単一の置換対象のためのもので、対応表の各画像には当てはまらない
+        match_by = "hash"
+        target_size = None
+        for path in replacements.values():
+            if not os.path.exists(path):
+                return False, 0, f"置換用画像が見つかりません: {path}"
+    
+    # マッチング方法の判定はループの外で一度だけ行い、エントリごとには選んだ関数を呼ぶだけにする
+    match = _make_matcher(match_by, target_identifier, replacement_image_path, target_size, replacements)
+    if match is None:
+        return False, 0, f"不明なマッチング方法です: {match_by}"
     
-    # 置換用画像を読み込み
-    with open(replacement_image_path, 'rb') as f:
-        replacement_data = f.read()
+    final_path = output_path if output_path else pptx_path
+    out_dir = os.path.dirname(os.path.abspath(final_path))
     
-    # 一時ディレクトリで作業
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_pptx = os.path.join(temp_dir, 'temp.pptx')
-        replaced_count = 0
+    copy_raw = _copy_zip_entry_raw
+    with _open_pptx(pptx_path) as zf_in:
+        infos = zf_in.infolist()
         
-        with zipfile.ZipFile(pptx_path, 'r') as zf_in:
-            with zipfile.ZipFile(temp_pptx, 'w', zipfile.ZIP_DEFLATED) as zf_out:
-                for item in zf_in.namelist():
-                    data = zf_in.read(item)
-                    
-                    # メディアファイルの場合、マッチングを確認
-                    if item.startswith('ppt/media/'):
-                        should_replace = False
-                        
-                        if match_by == "hash":
-                            file_hash = calculate_bytes_hash(data)
-                            should_replace = (file_hash == target_identifier)
-                        elif match_by == "filename":
-                            filename = os.path.basename(item)
-                            should_replace = (filename == target_identifier)
-                        elif match_by == "size":
-                            should_replace = (len(data) == int(target_identifier))
-                        
-                        if should_replace:
-                            # 画像を置換（拡張子を維持）
-                            data = replacement_data
-                            replaced_count += 1
-                    
-                    zf_out.writestr(item, data)
+        # 先にメディアエントリだけを照合し、置換するエントリ -> 置換用画像のパスを決めておく。
+        # 書き込みループでは辞書の参照だけで済み、マッチしないPPTXは書き直さない
+        matched = {}
+        media_prefix = _MEDIA_PREFIX
+        for info in infos:
+            if info.filename.startswith(media_prefix):
+                matched_path = match(zf_in, info)
+                if matched_path is not None:
+                    matched[info] = matched_path
+                    if len(matched) == max_replacements:
+                        # 上限に達したら残りのエントリは展開もハッシュ計算もしない
+                        break
         
-        if replaced_count > 0:
-            # バックアップを作成
-            if backup and output_path is None:
-                backup_path = pptx_path + '.backup'
-                if not os.path.exists(backup_path):
-                    shutil.copy2(pptx_path, backup_path)
-            
-            # 出力
-            final_path = output_path if output_path else pptx_path
-            shutil.copy2(temp_pptx, final_path)
-            return True, replaced_count, f"成功: {replaced_count}個の画像を置換しました"
-        else:
+        if not matched:
             return True, 0, "マッチする画像が見つかりませんでした"
+        
+        os.makedirs(out_dir, exist_ok=True)
+        # 出力先と同じディレクトリの一時ファイルで作業し、完成後に名前を置き換える
+        temp = tempfile.NamedTemporaryFile(dir=out_dir, suffix='.pptx.tmp', delete=False)
+        try:
+            with temp, zipfile.ZipFile(temp, 'w', zipfile.ZIP_DEFLATED, compresslevel=compress_level) as zf_out:
+                for info in infos:
+                    matched_path = matched.get(info)
+                    if matched_path is None:
+                        # XMLや置換しないメディアは展開・再圧縮せずそのままコピー
+                        copy_raw(zf_in, zf_out, info)
+                    else:
+                        # 画像を置換（拡張子を維持）。置換用画像は一括置換では2ファイル目以降キャッシュを再利用
+                        _write_entry(zf_out, info, read_image_bytes(matched_path), compress_level)
+        except BaseException:
+            os.remove(temp.name)
+            raise
+    
+    replaced_count = len(matched)
+    try:
+        # バックアップを作成
+        if backup and output_path is None:
+            backup_path = pptx_path + '.backup'
+            if not os.path.exists(backup_path):
+                _link_or_copy(pptx_path, backup_path)
+        
+        # 出力（一時ファイルは0600で作られるため元ファイルの権限に揃える）
+        shutil.copymode(pptx_path, temp.name)
+        os.replace(temp.name, final_path)
+        return True, replaced_count, f"成功: {replaced_count}個の画像を置換しました"
+    except BaseException:
+        if os.path.exists(temp.name):
+            os.remove(temp.name)
+        raise
 
 
 def batch_replace_images(
     directory: str,
-    target_identifier: str,
-    replacement_image_path: str,
+    target_identifier: Optional[str],
+    replacement_image_path: Optional[str],
     match_by: str = "hash",
     recursive: bool = True,
     output_dir: Optional[str] = None,
-    backup: bool = True
+    backup: bool = True,
+    compress_level: int = _DEFAULT_COMPRESS_LEVEL,
+    target_size: Optional[int] = None,
+    replacements: Optional[Dict[str, str]] = None,
+    max_replacements: Optional[int] = None
 ) -> Dict[str, Tuple[bool, int, str]]:
     """
     複数のPPTXファイルで画像を一括置換
@@ -171,40 +539,98 @@ def batch_replace_images(
         recursive: サブディレクトリも検索するか
         output_dir: 出力先ディレクトリ（Noneの場合は上書き）
         backup: バックアップを作成するか
+        compress_level: 置換した画像を圧縮する場合のDEFLATEレベル（0-9）
+        target_size: match_by="hash" / "crc32" のとき、置換対象の画像のバイトサイズ（任意）
+        replacements: ハッシュ -> 置換用画像のパス（各PPTXを1回の書き換えで複数置換）
+        max_replacements: 1ファイルあたりの最大置換数（任意）
     
     Returns:
         ファイルパスと結果のマッピング
     """
     results = {}
-    pptx_files = find_pptx_files(directory, recursive)
+    pptx_files = []
     
-    print(f"\n見つかったPPTXファイル: {len(pptx_files)}件")
+    print(f"\nPPTXファイルを検索しながら置換します: {directory}")
     print("-" * 50)
     
-    for pptx_path in pptx_files:
-        # 出力パスの決定
-        if output_dir:
-            os.makedirs(output_dir, exist_ok=True)
-            rel_path = os.path.relpath(pptx_path, directory)
-            output_path = os.path.join(output_dir, rel_path)
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        else:
-            output_path = None
-        
-        success, count, message = replace_image_in_pptx(
-            pptx_path,
-            target_identifier,
-            replacement_image_path,
-            match_by,
-            output_path,
-            backup
-        )
+    # 検索結果は一覧の完成を待たずに、見つかった順に処理する
+    # （出力先が検索対象の中にある場合、書き出したファイルを再び拾わないよう除外する）
+    output_prefix = os.path.join(os.path.abspath(output_dir), '') if output_dir else None
+    found = (p for p in find_pptx_files(directory, recursive)
+             if not (output_prefix and os.path.abspath(p).startswith(output_prefix)))
+    # CPU数まで（1ファイルだけかを判定するため最低2つ）を先に探し、プロセス数をファイル数以下に抑える
+    n_cpu = os.cpu_count() or 1
+    head = list(islice(found, max(n_cpu, 2)))
+    
+    def output_path_for(pptx_path: str) -> Optional[str]:
+        if not output_dir:
+            return None
+        rel_path = os.path.relpath(pptx_path, directory)
+        output_path = os.path.join(output_dir, rel_path)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return output_path
+    
+    def task_args(pptx_path: str) -> tuple:
+        # replace_image_in_pptx の引数
+        return (pptx_path, target_identifier, replacement_image_path, match_by,
+                output_path_for(pptx_path), backup, compress_level, target_size,
+                replacements, max_replacements)
+    
+    def record(pptx_path: str, result) -> None:
+        success, count, message = result
         results[pptx_path] = (success, count, message)
-        
         status = "✓" if success and count > 0 else "○" if success else "✗"
         print(f"{status} {os.path.basename(pptx_path)}: {message}")
     
-    return results
+    if len(head) <= 1:
+        # 1ファイルだけならプロセスを起動せずにこのプロセスで置換する
+        for pptx_path in head:
+            pptx_files.append(pptx_path)
+            try:
+                record(pptx_path, replace_image_in_pptx(*task_args(pptx_path)))
+            except Exception as e:
+                record(pptx_path, (False, 0, f"エラー: {e}"))
+        return dict(results)
+    
+    # 置換用画像はここで一度だけ読み、各ワーカーには起動時に渡す
+    # （バッチの途中で画像が更新されても、全ファイルに同じ内容が書き込まれる）
+    image_paths = set(replacements.values()) if replacements else {replacement_image_path}
+    preload = {os.path.abspath(p): read_image_bytes(p) for p in image_paths if os.path.isfile(p)}
+    
+    # ファイルごとに独立しているため複数プロセスで並列に置換し、終わった順に表示する
+    with _process_pool(len(head), preload) as executor:
+        futures = {}
+        for pptx_path in chain(head, found):
+            pptx_files.append(pptx_path)
+            future = executor.submit(replace_image_in_pptx, *task_args(pptx_path))
+            futures[future] = pptx_path
+        
+        for future in as_completed(futures):
+            pptx_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 壊れたPPTXや権限エラーなどは、そのファイルの失敗として記録して続ける
+                result = (False, 0, f"エラー: {e}")
+            record(pptx_path, result)
+    
+    # 結果は検索順に並べて返す
+    return {p: results[p] for p in pptx_files}
+
+
+def load_replacement_mapping(mapping_path: str) -> Dict[str, str]:
+    """
+    置換マッピングのJSON（{"ハッシュ": "置換用画像のパス", ...}）を読み込み
+    
+    相対パスはJSONファイルのあるディレクトリを基準にする。
+    """
+    with open(mapping_path, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    if not isinstance(mapping, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in mapping.items()):
+        raise ValueError("{\"ハッシュ\": \"置換用画像のパス\"} 形式のオブジェクトが必要です")
+    base_dir = os.path.dirname(os.path.abspath(mapping_path))
+    return {h.lower(): os.path.join(base_dir, p) for h, p in mapping.items()}
 
 
 def analyze_target_image(image_path: str) -> None:
@@ -219,11 +645,14 @@ def analyze_target_image(image_path: str) -> None:
     print("=" * 50)
     print(f"ファイル名: {info['filename']}")
     print(f"ファイルサイズ: {info['size']} bytes")
-    print(f"MD5ハッシュ: {info['hash']}")
+    print(f"CRC32: {info['crc32']}")
+    print(f"{_hash_label()}ハッシュ: {info['hash']}")
     print("\n使用例:")
     print(f"  --match-by hash --target {info['hash']}")
+    print(f"  --match-by hash --target {info['hash']} --target-size {info['size']}  （サイズで候補を絞って高速化）")
     print(f"  --match-by filename --target {info['filename']}")
     print(f"  --match-by size --target {info['size']}")
+    print(f"  --match-by crc32 --target {info['crc32']} --target-size {info['size']}  （展開せずに判定）")
     print("=" * 50)
 
 
@@ -236,7 +665,7 @@ def scan_pptx_images(pptx_path: str) -> None:
     images = list_images_in_pptx(pptx_path)
     print(f"\n{pptx_path} 内の画像一覧:")
     print("-" * 80)
-    print(f"{'No.':<4} {'ファイル名':<25} {'サイズ':<12} {'MD5ハッシュ'}")
+    print(f"{'No.':<4} {'ファイル名':<25} {'サイズ':<12} {_hash_label() + 'ハッシュ'}")
     print("-" * 80)
     
     for i, img in enumerate(images, 1):
@@ -246,14 +675,98 @@ def scan_pptx_images(pptx_path: str) -> None:
     print(f"合計: {len(images)}個の画像")
 
 
-def scan_directory_images(directory: str, recursive: bool = True) -> None:
-    """ディレクトリ内の全PPTXファイルの画像を分析"""
-    pptx_files = find_pptx_files(directory, recursive)
+def _load_image_index(index_path: str) -> Dict[str, Dict]:
+    """
+    画像一覧のインデックスを読み込み（PPTXの相対パス -> 更新日時・サイズ・画像一覧）
+    
+    ハッシュ方式が異なる・壊れている場合は空として扱う。
+    """
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != _INDEX_VERSION \
+            or index.get("hash_algo") != _hash_algo:
+        return {}
+    files = index.get("files")
+    if not isinstance(files, dict):
+        return {}
+    # 必要な項目が揃っていないエントリは、変更されたPPTXと同様に計算し直す
+    return {
+        rel_path: entry for rel_path, entry in files.items()
+        if isinstance(entry, dict) and isinstance(entry.get("mtime_ns"), int)
+        and isinstance(entry.get("size"), int) and isinstance(entry.get("images"), list)
+    }
+
+
+def _save_image_index(index_path: str, files: Dict[str, Dict]) -> None:
+    """画像一覧のインデックスを保存（書き込めない場所では何もしない）"""
+    index = {"version": _INDEX_VERSION, "hash_algo": _hash_algo, "files": files}
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.tmp', delete=False,
+                                         dir=os.path.dirname(index_path)) as f:
+            temp_path = f.name
+            json.dump(index, f, ensure_ascii=False)
+        # 一時ファイルは0600で作られるため、通常のファイル作成と同じくumaskに従った権限にする
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, index_path)
+    except OSError:
+        if temp_path is not None and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def scan_directory_images(directory: str, recursive: bool = True, use_cache: bool = True) -> None:
+    """
+    ディレクトリ内の全PPTXファイルの画像を分析
+    
+    use_cache=True の場合、ディレクトリ直下のインデックス（_INDEX_FILENAME）に前回の結果を
+    保存し、更新日時・サイズが変わっていないPPTXは展開・ハッシュ計算をせずに再利用する。
+    """
+    pptx_files = list(find_pptx_files(directory, recursive))
     
     all_images = {}  # hash -> {info, files}
     
-    for pptx_path in pptx_files:
-        images = list_images_in_pptx(pptx_path)
+    index_path = os.path.join(directory, _INDEX_FILENAME)
+    cached_files = _load_image_index(index_path) if use_cache else {}
+    new_files = {}
+    listed = [None] * len(pptx_files)
+    pending = []
+    for i, pptx_path in enumerate(pptx_files):
+        st = os.stat(pptx_path)
+        rel_path = os.path.relpath(pptx_path, directory)
+        entry = cached_files.get(rel_path)
+        if entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            listed[i] = entry["images"]
+            new_files[rel_path] = entry
+        else:
+            pending.append((i, rel_path, st))
+    
+    def store(pending_images) -> None:
+        for (i, rel_path, st), images in zip(pending, pending_images):
+            listed[i] = images
+            new_files[rel_path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "images": images}
+    
+    # キャッシュにないPPTXだけを、複数プロセスで並列に展開・ハッシュ計算
+    # （1ファイルだけならプロセスを起動せずにこのプロセスで処理する）
+    pending_paths = [pptx_files[i] for i, _, _ in pending]
+    if len(pending) == 1:
+        store([list_images_in_pptx(pending_paths[0])])
+    elif pending:
+        with _process_pool(len(pending)) as executor:
+            store(executor.map(list_images_in_pptx, pending_paths, chunksize=4))
+    
+    # 削除されたPPTXの分は書き戻さない
+    if use_cache and (pending or len(new_files) != len(cached_files)):
+        _save_image_index(index_path, new_files)
+    
+    for pptx_path, images in zip(pptx_files, listed):
         for img in images:
             h = img['hash']
             if h not in all_images:
@@ -323,26 +836,60 @@ def main():
     
     # 置換オプション
     parser.add_argument("--target", "-t", help="置換対象の識別子（ハッシュ、ファイル名、またはサイズ）")
+    parser.add_argument("--mapping", metavar="JSON",
+                        help="ハッシュ -> 置換用画像パスのJSON。複数の画像を1回の書き換えでまとめて置換する")
+    parser.add_argument("--target-size", type=int, metavar="BYTES",
+                        help="--match-by hash / crc32 のとき、置換対象の画像のサイズ。指定するとサイズの異なる画像のハッシュ計算を省く")
     parser.add_argument("--replacement", "-r", help="置換用画像のパス")
-    parser.add_argument("--match-by", "-m", choices=["hash", "filename", "size"], default="hash",
-                        help="マッチング方法（デフォルト: hash）")
+    parser.add_argument("--match-by", "-m", choices=["hash", "filename", "size", "crc32"], default="hash",
+                        help="マッチング方法（デフォルト: hash。crc32 は展開せずZIPに記録されたCRC32で判定）")
+    parser.add_argument("--max-replacements", type=int, metavar="N",
+                        help="1ファイルあたりの最大置換数。達した後の画像は調べずにそのままコピーする")
     parser.add_argument("--output-dir", "-o", help="出力先ディレクトリ（指定しない場合は上書き）")
     parser.add_argument("--no-backup", action="store_true", help="バックアップを作成しない")
     parser.add_argument("--no-recursive", action="store_true", help="サブディレクトリを検索しない")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"--scan-dir で前回の結果（{_INDEX_FILENAME}）を使わず、保存もしない")
+    parser.add_argument("--compress-level", type=int, choices=range(10), default=_DEFAULT_COMPRESS_LEVEL,
+                        metavar="0-9",
+                        help=f"置換した画像を圧縮する場合のDEFLATEレベル（デフォルト: {_DEFAULT_COMPRESS_LEVEL}。"
+                             "PNG/JPEG/GIFは常に無圧縮で格納）")
+    parser.add_argument("--hash-algo", choices=HASH_ALGORITHMS, default="md5",
+                        help="ハッシュ方式（デフォルト: md5。xxh3_128は高速だがxxhashが必要で、"
+                             "md5とは異なる識別子になる）")
     
     args = parser.parse_args()
     
+    try:
+        set_hash_algorithm(args.hash_algo)
+    except ValueError as e:
+        parser.error(str(e))
+    
     # モードに応じた処理
     if args.analyze:
         analyze_target_image(args.analyze)
     elif args.scan:
         scan_pptx_images(args.scan)
     elif args.scan_dir:
-        scan_directory_images(args.scan_dir, not args.no_recursive)
+        scan_directory_images(args.scan_dir, not args.no_recursive, not args.no_cache)
     elif args.directory:
-        if not args.target or not args.replacement:
-            parser.error("--directory モードでは --target と --replacement が必要です")
-        
+        replacements = None
+        if args.mapping:
+            if args.target or args.replacement or args.match_by != "hash" or args.target_size is not None:
+                parser.error("--mapping は --target / --replacement / --match-by / --target-size と同時に指定できません")
+            try:
+                replacements = load_replacement_mapping(args.mapping)
+            except (OSError, ValueError) as e:
+                parser.error(f"--mapping を読み込めません: {e}")
+        elif not args.target or not args.replacement:
+            parser.error("--directory モードでは --target と --replacement（または --mapping）が必要です")
+        if args.max_replacements is not None and args.max_replacements < 1:
+            parser.error("--max-replacements には1以上を指定してください")
+        if args.match_by == "size" and not args.target.isdigit():
+            parser.error("--match-by size の --target にはバイト数（整数）を指定してください")
+        if args.match_by == "crc32" and not re.fullmatch(r'[0-9a-fA-F]{1,8}', args.target):
+            parser.error("--match-by crc32 の --target には16進数のCRC32を指定してください")
+
         results = batch_replace_images(
             args.directory,
             args.target,
@@ -350,7 +897,11 @@ def main():
             args.match_by,
             not args.no_recursive,
             args.output_dir,
-            not args.no_backup
+            not args.no_backup,
+            args.compress_level,
+            args.target_size,
+            replacements,
+            args.max_replacements
         )
         
         # 結果サマリー